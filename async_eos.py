@@ -0,0 +1,99 @@
+import asyncio, functools
+from concurrent.futures import ThreadPoolExecutor
+from capture import EOS
+import gphoto_util
+
+class AsyncEOS(object):
+    """
+    asyncio interface for a Canon EOS R5 C.
+
+    Every blocking libgphoto2 call runs on a dedicated executor thread for this camera, the coroutines just await the result.
+    One event loop can therefore drive a whole rig (and anything else, e.g. a network control plane) without a thread per call.
+    Calls to the same camera are executed one after another, calls to different cameras run in parallel.
+
+    Create instances with: cam = await AsyncEOS.open(port=port)
+    """
+
+    def __init__(self, eos, executor):
+        self.eos = eos
+        self.executor = executor
+
+    @classmethod
+    async def open(cls, port=None, **kwargs):
+        '''Initialise the camera at the given port (see EOS()) on a new executor thread.'''
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'EOS {port}')
+        loop = asyncio.get_running_loop()
+        try:
+            eos = await loop.run_in_executor(executor, functools.partial(EOS, port=port, **kwargs))
+        except BaseException:
+            executor.shutdown(wait=False)
+            raise
+        return cls(eos, executor)
+
+    async def call(self, method, *args, **kwargs):
+        '''Run any EOS method by name on the camera's executor thread and return its result.'''
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(getattr(self.eos, method), *args, **kwargs))
+
+    async def get_capture_parameters(self, refresh=False):
+        '''See EOS.get_capture_parameters().'''
+        return await self.call('get_capture_parameters', refresh=refresh)
+
+    async def set_capture_parameters(self, aperture=None, iso=None, shutterspeed=None, c_AF=None):
+        '''See EOS.set_capture_parameters().'''
+        return await self.call('set_capture_parameters', aperture=aperture, iso=iso, shutterspeed=shutterspeed, c_AF=c_AF)
+
+    async def capture_image(self, **kwargs):
+        '''See EOS.capture_image().'''
+        return await self.call('capture_image', **kwargs)
+
+    async def capture_burst(self, **kwargs):
+        '''See EOS.capture_burst().'''
+        return await self.call('capture_burst', **kwargs)
+
+    async def capture_video(self, **kwargs):
+        '''See EOS.capture_video().'''
+        return await self.call('capture_video', **kwargs)
+
+    async def record_video(self, **kwargs):
+        '''See EOS.record_video().'''
+        return await self.call('record_video', **kwargs)
+
+    async def preview_frames(self, max_frames=None, decode=False):
+        '''
+        Asynchronous generator of preview frames, see EOS.preview_frames().
+        Each frame is captured on the executor thread and yielded as bytes (a copy, since the frame leaves the capturing thread)
+        or as a NumPy array if decode=True.
+        '''
+        frames = self.eos.preview_frames(max_frames=max_frames, decode=decode, pool_size=1)
+        loop = asyncio.get_running_loop()
+        def next_frame():
+            frame = next(frames, None)
+            if frame is None or decode:
+                return frame
+            return bytes(frame)
+        try:
+            while True:
+                frame = await loop.run_in_executor(self.executor, next_frame)
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            await loop.run_in_executor(self.executor, frames.close)
+
+    async def close(self):
+        '''Release the camera and stop its executor thread.'''
+        await self.call('close')
+        self.executor.shutdown(wait=True)
+        return
+
+
+async def open_cameras(ports=None, **kwargs):
+    '''
+    Initialise all given ports (or all detected EOS cameras) concurrently.
+    Output: list of AsyncEOS, one per port
+    '''
+    if ports is None:
+        loop = asyncio.get_running_loop()
+        ports = await loop.run_in_executor(None, gphoto_util.detect_EOS_cameras) or []
+    return await asyncio.gather(*[AsyncEOS.open(port=port, **kwargs) for port in ports])
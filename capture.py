@@ -1,7 +1,234 @@
 import gphoto2 as gp
-import subprocess as sp, logging, os
-import time
+import subprocess as sp, logging, os, warnings
+import time, json, threading, mmap, io, queue, concurrent.futures, bisect, re
+from fractions import Fraction
 from subprocess import Popen, PIPE
+import gphoto_util
+from workers import FileWriter, PipeWriter
+from preview import PreviewService
+from timing import wait_until
+from events import EventDispatcher, LockedCamera, FILE_ADDED, CONFIG_CHANGED
+
+# bounds (in seconds) of the exponential backoff used while waiting for the camera
+BACKOFF_MIN = 0.02
+BACKOFF_MAX = 0.5
+
+# ffmpeg output options for recording preview videos, see EOS.record_preview_video()
+ENCODER_PROFILES = {
+    'x264': {'args': ['-c:v', 'libx264', '-pix_fmt', 'yuvj422p'], 'extension': '.mp4', 'encode': True}, # default x264 settings, best compression, most CPU
+    'x264_fast': {'args': ['-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'zerolatency', '-pix_fmt', 'yuvj422p'], 'extension': '.mp4', 'encode': True}, # low CPU and latency, larger files
+    'passthrough': {'args': ['-c:v', 'copy'], 'extension': '.mkv', 'encode': False}, # store the camera's MJPEG frames as they are, almost no CPU, transcode offline
+}
+
+# on-disk cache of the aperture, shutter speed and ISO choices reported by each camera body/lens, see EOS.load_choices()
+CHOICE_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'cam_interface', 'choices.json')
+
+_choice_cache_lock = threading.RLock()
+
+# Choices of the Canon EOS R5 C per mode (0 == PHOTO, 1 == VIDEO), only used for settings whose choices the camera does not report
+FALLBACK_CHOICES = {
+    0: {
+        'aperture': [2.8, 3.2, 3.5, 4, 4.5, 5, 5.6, 6.3, 7.1, 8, 9, 10, 11, 13, 14, 16, 18, 20, 22, 25, 29, 32],
+        'shutterspeed': ['30', '25', '20', '15', '13', '10.3', '8', '6.3', '5', '4', '3.2', '2.5', '2', '1.6', '1.3', '1', '0.8', '0.6', '0.5', '0.4', '0.3', '1/4', '1/5', '1/6', '1/8', '1/10', '1/13', '1/15', '1/20', '1/25', '1/30', '1/40', '1/50', '1/60', '1/80', '1/100', '1/125', '1/160', '1/200', '1/250', '1/320', '1/400', '1/500', '1/640', '1/800', '1/1000', '1/1250', '1/1600', '1/2000', '1/2500', '1/3200', '1/4000', '1/5000', '1/6400', '1/8000'],
+        'iso': [100, 125, 160, 200, 250, 320, 400, 500, 640, 800, 1000, 1250, 1600, 2000, 2500, 3200, 4000, 5000, 6400, 8000, 10000, 12800, 16000, 20000, 25600, 32000, 40000, 51200],
+    },
+    1: {
+        'aperture': [2.8, 3.2, 3.5, 4, 4.5, 5, 5.6, 6.3, 7.1, 8, 9, 10, 11, 14, 16, 18, 20, 22, 25, 29, 32],
+        'shutterspeed': ['1/50', '1/60', '1/75', '1/90', '1/100', '1/120', '1/150', '1/180','1/210', '1/250', '1/300', '1/360',  '1/420',  '1/500',  '1/600',  '1/720',  '1/840',  '1/1000', '1/1200', '1/1400', '1/1700', '1/2000'],
+        'iso': [], # ISO can only be set in PHOTO mode
+    },
+}
+
+# Canon EOS PTP property codes of the widgets this class reads and writes, to tell which cached widget a property change event refers to
+# when libgphoto2 does not name the widget in the event itself
+EOS_PROPERTY_WIDGETS = {
+    0xd101: 'aperture',
+    0xd102: 'shutterspeed',
+    0xd103: 'iso',
+    0xd104: 'exposurecompensation',
+    0xd105: 'autoexposuremode',
+    0xd106: 'drivemode',
+    0xd107: 'meteringmode',
+    0xd108: 'focusmode',
+    0xd109: 'whitebalance',
+    0xd120: 'imageformat',
+}
+
+class CameraError(Exception):
+    '''Raised when the camera rejects or fails a command.'''
+
+class CameraBusyError(CameraError):
+    '''Raised when the USB port stays busy (gphoto2 error -110) for longer than the retry budget.'''
+
+class ConfigTimeoutError(CameraError):
+    '''Raised when the camera does not confirm a configuration change in time.'''
+
+def load_manifest(manifest_file):
+    '''Load a sync manifest (see EOS.sync_media()), returns an empty manifest if the file does not exist yet.'''
+    if not os.path.exists(manifest_file):
+        return {}
+    with open(manifest_file) as f:
+        return json.load(f)
+
+def save_manifest(manifest, manifest_file):
+    '''Write a sync manifest atomically, so that an interruption never leaves a corrupt manifest behind.'''
+    tmp_file = manifest_file + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_file, manifest_file)
+
+def parse_property_event(data):
+    '''
+    Parse the text of a Canon property change event, e.g. 'PTP Property d103 changed' or (newer libgphoto2) 'PTP Property d103 changed, "iso" to "400"'.
+    Output: property code (int or None), widget name (string or None), new value (string or None)
+    '''
+    match = re.search(r'PTP Property ([0-9a-fA-F]+) changed(?:, "([^"]*)" to "([^"]*)")?', str(data))
+    if match is None:
+        return None, None, None
+    return int(match.group(1), 16), match.group(2), match.group(3)
+
+def decode_preview(frame):
+    '''
+    Decode a JPEG preview frame (bytes or memoryview, see EOS.preview_frames()) to a NumPy array (height x width x 3, uint8).
+    '''
+    from PIL import Image
+    import numpy as np
+    return np.asarray(Image.open(io.BytesIO(frame)))
+
+def preview_sharpness(frame, roi=None):
+    '''
+    Cheap focus metric for a JPEG preview frame: the variance of the Laplacian of the grey-scale image, higher == sharper.
+    The JPEG is decoded at half resolution in grey scale only (PIL draft mode), which keeps this at a few ms per frame.
+    Input: frame=bytes or memoryview (see EOS.preview_frames()), roi=optional (left, top, right, bottom) as fractions of the image size
+    Output: float
+    '''
+    from PIL import Image
+    import numpy as np
+    image = Image.open(io.BytesIO(frame))
+    image.draft('L', (image.width // 2, image.height // 2))
+    grey = np.asarray(image.convert('L'), dtype=np.float32)
+    if roi is not None:
+        height, width = grey.shape
+        left, top, right, bottom = roi
+        grey = grey[int(top * height):int(bottom * height), int(left * width):int(right * width)]
+    laplacian = grey[1:-1, :-2] + grey[1:-1, 2:] + grey[:-2, 1:-1] + grey[2:, 1:-1] - 4 * grey[1:-1, 1:-1]
+    return float(laplacian.var())
+
+def write_frame_times(base_path, wall_times, clock_times):
+    '''
+    Write the capture times of a recorded frame sequence next to the video file.
+    <base_path>.timestamps.txt: timecode format v2, i.e. one presentation time in ms (relative to the first frame) per line
+    <base_path>.frames.csv: frame index, host wall-clock time (s since epoch), and the offset to the first frame (s)
+    Output: paths of the timecode file and the frame log
+    '''
+    timecode_file = base_path + '.timestamps.txt'
+    frame_log = base_path + '.frames.csv'
+    start = clock_times[0] if clock_times else 0
+    with open(timecode_file, 'w') as f:
+        f.write('# timecode format v2\n')
+        for clock in clock_times:
+            f.write(f'{(clock - start) * 1000:.3f}\n')
+    with open(frame_log, 'w') as f:
+        f.write('frame,wall_time,offset\n')
+        for i, (wall, clock) in enumerate(zip(wall_times, clock_times)):
+            f.write(f'{i},{wall:.6f},{clock - start:.6f}\n')
+    return timecode_file, frame_log
+
+def reserve_output_file(directory, template, fields, extension, seq=0):
+    '''
+    Find an unused output file name and reserve it by atomically creating an empty placeholder, so that concurrent recordings never pick the same name.
+    The template is formatted with the given fields plus {seq}, which is counted up from seq until the name is free.
+    If the template has no {seq} field, a running number is appended on collisions.
+    Output: reserved file path, the seq value that was used + 1
+    '''
+    os.makedirs(directory, exist_ok=True)
+    while True:
+        name = template.format(seq=seq, **fields)
+        if '{seq' not in template and seq > 0:
+            name += f'_{seq}'
+        path = os.path.join(directory, name + extension)
+        seq += 1
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path, seq
+        except FileExistsError:
+            continue
+
+def parse_numeric(value):
+    '''
+    Parse a numeric setting value without evaluating it as code.
+    Input: int, float, or numeric string such as '25', '0.5', '10.3' or the fraction '1/50'
+    Output: float, or None if the value is not a number
+    '''
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(Fraction(str(value).strip()))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+def parse_choices(config_name, choices):
+    '''
+    Convert the choices of a camera widget to a choice list usable with ChoiceTable, non-numeric entries (e.g. 'bulb', 'Auto') are left out.
+    Apertures are returned as floats and ISO values as ints, shutter speeds keep the camera's own strings (e.g. '1/50').
+    '''
+    parsed = []
+    for choice in choices:
+        value = parse_numeric(choice)
+        if value is None:
+            continue
+        if config_name == 'aperture':
+            parsed.append(value)
+        elif config_name == 'iso':
+            parsed.append(int(value))
+        else:
+            parsed.append(str(choice))
+    return parsed
+
+def plan_sweep(axes):
+    '''
+    Order all combinations of the given setting values so that consecutive shots differ in as few settings as possible.
+    The grid is walked in serpentine order: the last axis changes fastest and reverses its direction whenever an outer axis steps,
+    so every shot changes exactly one setting. Put the settings that are slowest to change (e.g. the aperture) first.
+    Input: list of (config name, list of values) tuples
+    Output: list of dicts {config name: value}, one per shot
+    '''
+    plan = [{}]
+    for config_name, values in axes:
+        expanded = []
+        for i, shot in enumerate(plan):
+            for value in (values if i % 2 == 0 else values[::-1]):
+                expanded.append({**shot, config_name: value})
+        plan = expanded
+    return plan
+
+class ChoiceTable(object):
+    """
+    Lookup table for the choices of a numeric camera setting (aperture, shutter speed, ISO).
+    The choices are parsed once and sorted by value, so that the closest supported choice is found by bisection.
+    """
+
+    def __init__(self, choices):
+        self.choices = list(choices)
+        parsed = sorted((parse_numeric(choice), i) for i, choice in enumerate(self.choices) if parse_numeric(choice) is not None)
+        self.values = [value for value, i in parsed]
+        self.sorted_choices = [self.choices[i] for value, i in parsed]
+        self.index = {str(choice): choice for choice in self.choices} # exact matches, by their string form
+
+    def __contains__(self, choice):
+        return str(choice) in self.index
+
+    def closest(self, value):
+        '''
+        Find the choice closest to a numeric value.
+        Output: the choice (as given in the choice list), None if the table is empty
+        '''
+        if not self.values:
+            return None
+        i = bisect.bisect_left(self.values, value)
+        if i == len(self.values) or (i > 0 and value - self.values[i-1] <= self.values[i] - value):
+            i -= 1
+        return self.sorted_choices[i]
 
 class EOS(object):
     """
@@ -10,141 +237,493 @@ class EOS(object):
     Quickstart: Take a look first at the top-level API calls: get_capture_parameters(), capture_image(), capture_video(), and show_live_preview().
     """
 
-    def __init__(self, port=None):
+    def __init__(self, port=None, config_ttl=None, lazy_setup=True, choice_cache=CHOICE_CACHE_FILE):
+        # The duration of each start-up phase is recorded in self.init_times (seconds)
+        self.init_times = {}
+        phase_start = time.perf_counter()
+        def phase_done(name):
+            nonlocal phase_start
+            now = time.perf_counter()
+            self.init_times[name] = now - phase_start
+            phase_start = now
+
         # Kill any existing gphoto processes to free up the USB ports for communication
         # prevents error *Could not claim the USB device*
-        command = f'killall gvfsd-gphoto2 gvfs-gphoto2-volume-monitor'
-        sp.call([command], shell=True)
-
-        camera_list = list(gp.Camera.autodetect()) # Find all available cameras
+        # This and the camera/port/abilities lookups are shared between all EOS instances of this process (see gphoto_util)
+        gphoto_util.free_usb_ports()
+        camera_list = gphoto_util.autodetect() # Find all available cameras
+        if port is not None and port not in [entry[1] for entry in camera_list]:
+            camera_list = gphoto_util.autodetect(refresh=True) # the camera might have been connected since the last detection
         if not camera_list:
             print('No camera detected')
             exit()
+        phase_done('detect')
         
-        self.camera = gp.Camera()
+        self.camera = LockedCamera(gp.Camera()) # all calls are serialised with the event pump thread
         if port is not None: # If a port is specified, initialise the correct device, otherwise just use the first detected compatible device
-            port_info_list = gp.PortInfoList()
-            port_info_list.load()
-            idx = port_info_list.lookup_path(port)
-            self.camera.set_port_info(port_info_list[idx])
-
+            self.camera.set_port_info(gphoto_util.get_port_info(port))
             name = camera_list[[entry[1] for entry in camera_list].index(port)][0]
-            abilities_list = gp.CameraAbilitiesList()
-            abilities_list.load()
-            idx = abilities_list.lookup_model(name)
-            self.camera.set_abilities(abilities_list[idx])
+            self.camera.set_abilities(gphoto_util.get_abilities(name))
+        phase_done('port_setup')
 
         # Initialise camera
         self.camera.init()
-        self.config = self.camera.get_config()
+        phase_done('camera_init')
+        self.port = port if port is not None else self.camera.get_port_info().get_path()
+        self.recording_seq = 0 # running number for output file names, see record_preview_video()
+        # The full configuration tree is fetched once and indexed by widget name, getters read from this cache
+        # config_ttl: seconds the cached tree is considered fresh, None == keep until invalidated by a failed write
+        # (the event pump reports every property change, and only the changed widgets are re-read, see get_widget())
+        self.config_ttl = config_ttl
+        self.single_config = None # whether single-widget reads/writes are supported, None == not tried yet
+        self.last_transfer_time = None # duration (s) of the last full-size file transfer, used to schedule downloads during a burst
+        self.last_hold_duration = None # how long (s) the trigger/recording was actually held in the last burst or video recording
+        self.last_camera_path = None # camera path of the last image taken with capture_immediate()
+        self.last_capture_time = None # host time (time.perf_counter) at which the camera announced that image
+        self.refresh_config()
+        phase_done('config')
+        # a single background thread receives all camera events and routes them to whoever is waiting for them
+        self.events = EventDispatcher(self.camera)
+        self.events.subscribe(CONFIG_CHANGED, self._on_config_changed)
+        self.events.start()
         self.mode = self.get_camera_mode() # detects the manual switch state: 0 == PHOTO, 1 == VIDEO
         self.check_storage_medium() # check if an SD card is inserted and warn the user if not
+        phase_done('status')
+
+        # read the aperture, shutter speed and ISO choices of this body/lens, from the cache file if this combination was seen before
+        self.choice_cache = choice_cache
+        self.load_choices()
+        phase_done('choices')
+
+        self.wait_until_ready() # wait for the camera to finish initialising
+        phase_done('ready')
+
+        # The PHOTO mode set-up (manual exposure, save target, automatic capture parameters) costs several confirmed config writes.
+        # With lazy_setup it is deferred until a method first needs it (see ensure_setup()), otherwise it runs right away.
+        self.setup_done = False
+        if not lazy_setup:
+            self.ensure_setup()
+            phase_done('setup')
+
+    def ensure_setup(self):
+        '''
+        Run the PHOTO mode set-up once, if it has not been done yet:
+        set the auto-exposure mode to manual (so that shutter, aperture, and iso can be set remotely), the save target to the SD card,
+        and all capture parameters to automatic. Called automatically by all methods that capture or change capture parameters.
+        '''
+        if self.setup_done:
+            return
+        self.setup_done = True # set first, set_capture_parameters() below calls this method again
         if self.mode == 0:
-            self.set_exposure_manual() # set the camera's auto-exposure mode to manual, so that shutter, aperture, and iso can be set remotely
+            start = time.perf_counter()
+            if self.set_exposure_manual(): # set the camera's auto-exposure mode to manual, so that shutter, aperture, and iso can be set remotely
+                self.load_choices() # the choices depend on the auto-exposure mode, the ones read during initialisation may be incomplete
             self.set_save_target() # set the camera's save target to the SD card, so that all captures are saved to the SD card by default
             self.set_capture_parameters(aperture='AUTO', iso='AUTO', shutterspeed='AUTO', c_AF=False) # set the camera to automatic
-
-        # set the main capture configuration options for both PHOTO and VIDEO mode
-        # These ares specific to the Canon EOS R5 C
-        if self.mode == 0:
-            self.aperture_choices = [2.8, 3.2, 3.5, 4, 4.5, 5, 5.6, 6.3, 7.1, 8, 9, 10, 11, 13, 14, 16, 18, 20, 22, 25, 29, 32]
-            self.shutter_choices = ['30', '25', '20', '15', '13', '10.3', '8', '6.3', '5', '4', '3.2', '2.5', '2', '1.6', '1.3', '1', '0.8', '0.6', '0.5', '0.4', '0.3', '1/4', '1/5', '1/6', '1/8', '1/10', '1/13', '1/15', '1/20', '1/25', '1/30', '1/40', '1/50', '1/60', '1/80', '1/100', '1/125', '1/160', '1/200', '1/250', '1/320', '1/400', '1/500', '1/640', '1/800', '1/1000', '1/1250', '1/1600', '1/2000', '1/2500', '1/3200', '1/4000', '1/5000', '1/6400', '1/8000']
-            self.iso_choices = [100, 125, 160, 200, 250, 320, 400, 500, 640, 800, 1000, 1250, 1600, 2000, 2500, 3200, 4000, 5000, 6400, 8000, 10000, 12800, 16000, 20000, 25600, 32000, 40000, 51200]
-        else:
-            self.aperture_choices = [2.8, 3.2, 3.5, 4, 4.5, 5, 5.6, 6.3, 7.1, 8, 9, 10, 11, 14, 16, 18, 20, 22, 25, 29, 32] # option 13 is missing
-            self.shutter_choices = ['1/50', '1/60', '1/75', '1/90', '1/100', '1/120', '1/150', '1/180','1/210', '1/250', '1/300', '1/360',  '1/420',  '1/500',  '1/600',  '1/720',  '1/840',  '1/1000', '1/1200', '1/1400', '1/1700', '1/2000']
-        
-        time.sleep(1) # wait for the camera to initialise
+            self.init_times['setup'] = time.perf_counter() - start
+        return
 
 
     ''' Universal Methods, work in both PHOTO and VIDEO mode '''
 
-    def set_config_and_confirm(self, config_names, values, timeout=6):
+    def set_config_and_confirm(self, config_names, values, timeout=6, busy_retries=5, force=False):
         '''
         Helper function to set and 'push' a list of new configurations to the camera.
-        This function then also fetches the currently active configuration from the camera to confirm that the named configurations have been updated successfully.
+        Only the configurations whose requested value differs from the cached camera state are sent, so re-asserting
+        values that are already active costs no USB round trip at all. Use force=True to send all of them regardless.
+        This function then waits for the camera to confirm that the named configurations have been updated successfully.
+        Instead of polling the camera back to back, it listens for the camera's property change events and re-reads the values
+        after each event, or at the latest after a backoff interval that doubles up to BACKOFF_MAX seconds.
+        Raises ConfigTimeoutError if the camera does not confirm within timeout seconds,
+        CameraBusyError if the port stays busy (-110) for more than busy_retries attempts, and CameraError for any other gphoto2 error.
         '''
 
-        # TODO: add timeout and warning
+        changes = self.push_config_changes(config_names, values, busy_retries, force)
+        if changes is None:
+            return False
+        if not changes:
+            return True # nothing to do, the camera already has these values
+        config_names, values = [list(entries) for entries in zip(*changes)]
+        return self.confirm_config(config_names, values, timeout, busy_retries)
 
+    def push_config_changes(self, config_names, values, busy_retries=5, force=False):
+        '''
+        First half of set_config_and_confirm(): write the values that differ from the cached state (all of them if force=True)
+        to the camera, without waiting for the camera to confirm them. Use confirm_config() for that, e.g. after doing other USB work in between.
+        Output: list of the (config name, value) pairs that were sent, None if a value could not be set
+        '''
         # First, change all the given values
         try:
-            for config_name, value in zip(config_names, values):
-                conf = gp.check_result(gp.gp_widget_get_child_by_name(self.config, config_name))
+            changes = list(zip(config_names, values))
+            if not force:
+                changes = [(config_name, value) for config_name, value in changes if self.get_widget(config_name).get_value() != value]
+            if not changes:
+                return changes
+            for config_name, value in changes:
+                conf = self.get_widget(config_name)
                 conf.set_value(value)
         except Exception as err:
-            print(f"Unhandled gphoto2 error: ({err}) while setting config {config_name} to {value}")
-            return False
+            print(f"Unhandled gphoto2 error: ({err}) while setting config {config_names} to {values}")
+            return None
 
         # Then push all changes to the camera
-        success = False
-        while not success:
-            try:
-                OK = gp.check_result(gp.gp_camera_set_config(self.camera, self.config))
-                start = time.time()
-                while not success and time.time() - start < timeout:
-                    # Check if the camera has updated the configuration
-                    # This should prevent any commands being skipped
-                    new_config = self.camera.get_config()
-                    for config_name, value in zip(config_names, values):
-                        conf = gp.check_result(gp.gp_widget_get_child_by_name(new_config, config_name))
-                        if conf.get_value() != value:
-                            break
-                    else:
-                        success = True # this is only reached if the for loop is not broken 
-                        self.config = new_config
-                        break
-                else:
-                    print(f"Camera did not confirm new configuration within {timeout} seconds")
-                    return False
-            except Exception as err:
-                if '-110' in str(err):
-                    error_msg = f"Camera is busy, retrying..."
-                else:
-                    error_msg = f"Unhandled gphoto2 error: ({err}) while setting config {config_name} to {value}"
-                # this is only here to catch an "I/O Busy" error and make sure the command is sent, even if the port is busy for a moment
-                pass
-        return success
-    
-    def set_config_fire_and_forget(self, config_name, value):
+        names = [config_name for config_name, value in changes]
+        try:
+            self._retry_if_busy(lambda: self.push_config(names), f"setting config {config_names} to {values}", busy_retries)
+        except CameraError:
+            self.invalidate_config() # the cache holds the requested, unsent values
+            raise
+        return changes
+
+    def confirm_config(self, config_names, values, timeout=6, busy_retries=5):
+        '''
+        Second half of set_config_and_confirm(): wait until the camera reports the given values for the named configurations.
+        Raises ConfigTimeoutError if the camera does not confirm within timeout seconds.
+        Output: bool, True once confirmed
+        '''
+        description = f"confirming config {config_names} = {values}"
+        try:
+            # Check if the camera has updated the configuration
+            # This should prevent any commands being skipped
+            deadline = time.monotonic() + timeout
+            delay = BACKOFF_MIN
+            while True:
+                seen = self.events.counts[CONFIG_CHANGED]
+                current = self._retry_if_busy(lambda: self.read_config_values(config_names), description, busy_retries)
+                if all(current[config_name] == value for config_name, value in zip(config_names, values)):
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ConfigTimeoutError(f"Camera did not confirm new configuration {config_names} = {values} within {timeout} seconds")
+                self.wait_for_config_change(min(delay, remaining), after=seen)
+                delay = min(delay * 2, BACKOFF_MAX)
+        except CameraError:
+            self.invalidate_config() # the cache holds the requested, unconfirmed values
+            raise
+
+    def set_config_fire_and_forget(self, config_name, value, busy_retries=5):
         '''
         Fast & unreliable, but essential for trigger-only settings, that need to simply overwrite the current value without waiting for a confirmation.
 
         Helper function to 'push' a new configuration to the camera.
         This function does not wait for a camera event, indicating that the named configuration has been updated.
         This function is faster, but trusts that the command was executed.
+        Only the named widget is written (see push_config()), which keeps triggers like eosremoterelease as fast as possible.
+        Raises CameraBusyError if the port stays busy (-110) for more than busy_retries attempts, and CameraError for any other gphoto2 error.
         '''
-        success = False
-        while not success:
+        def push():
+            conf = self.get_widget(config_name)
+            conf.set_value(value)
+            return self.push_config([config_name])
+        return self._retry_if_busy(push, f"setting config {config_name} to {value}", busy_retries)
+
+    def _retry_if_busy(self, action, description, busy_retries):
+        '''
+        Helper function to run a camera I/O action, retrying with bounded exponential backoff while the port reports "I/O busy" (-110).
+        Any other error is raised as CameraError right away.
+        '''
+        delay = BACKOFF_MIN
+        for attempt in range(busy_retries + 1):
             try:
-                conf = gp.check_result(gp.gp_widget_get_child_by_name(self.config, config_name))
-                conf.set_value(value)
-                OK = gp.check_result(gp.gp_camera_set_config(self.camera, self.config))
-                success = True
+                return action()
+            except CameraError:
+                raise
             except Exception as err:
-                if '-110' in str(err):  # this is only here to catch an "I/O Busy" error and make sure the command is sent, even if the port is busy for a moment
-                    error_msg = f"Camera is busy, retrying..."
-                else:
-                    error_msg = f"Unhandled gphoto2 error: ({err}) while setting config {config_name} to {value}"
-                pass
-        return success
-    
+                if '-110' not in str(err):
+                    raise CameraError(f"Unhandled gphoto2 error: ({err}) while {description}") from err
+                if attempt == busy_retries:
+                    raise CameraBusyError(f"Camera still busy after {busy_retries} retries while {description}") from err
+                time.sleep(delay)
+                delay = min(delay * 2, BACKOFF_MAX)
+
+    def wait_for_config_change(self, timeout, after=None):
+        '''
+        Block until the camera reports a changed property, or until timeout seconds have passed.
+        Pass after=self.events.counts[CONFIG_CHANGED] (read earlier) to also count changes reported since then.
+        Output: bool, True if a config change event was received
+        '''
+        return self.events.wait_for(CONFIG_CHANGED, timeout, after=after)
+
+    def push_config(self, config_names):
+        '''
+        Helper function to write the cached values of the named configurations to the camera.
+        Uses gp_camera_set_single_config to send only the named widgets instead of the full configuration tree.
+        Falls back to pushing the full tree with gp_camera_set_config if the installed libgphoto2/python-gphoto2 lacks single-config support.
+        Input: list of strings, names of the configurations
+        Output: bool, True if the values were sent
+        '''
+        if self.single_config is not False:
+            try:
+                for config_name in config_names:
+                    self.camera.set_single_config(config_name, self._config_index[config_name])
+                self.single_config = True
+                return True
+            except Exception as err:
+                if not self._not_supported(err):
+                    raise
+                if self.single_config is None: # only give up on single-config for good if it never worked
+                    self.single_config = False
+        self.camera.set_config(self.config)
+        return True
+
+    def read_config_values(self, config_names):
+        '''
+        Helper function to read the current values of the named configurations directly from the camera.
+        Uses gp_camera_get_single_config to fetch only the named widgets and updates the cached values accordingly.
+        Falls back to fetching (and caching) the full configuration tree if single-config reads are not supported.
+        Input: list of strings, names of the configurations
+        Output: dict {config name: current value}
+        '''
+        if self.single_config is not False:
+            try:
+                values = {}
+                read_start = time.monotonic()
+                for config_name in config_names:
+                    values[config_name] = self.camera.get_single_config(config_name).get_value()
+                self.single_config = True
+                for config_name, value in values.items():
+                    self._config_index[config_name].set_value(value) # keep the cache in sync
+                    if self._stale_widgets.get(config_name, read_start) < read_start: # changes reported during the read may not be in it yet
+                        del self._stale_widgets[config_name]
+                    self._read_times[config_name] = read_start
+                return values
+            except Exception as err:
+                if not self._not_supported(err):
+                    raise
+                if self.single_config is None:
+                    self.single_config = False
+        self.refresh_config()
+        return {config_name: self._config_index[config_name].get_value() for config_name in config_names}
+
+    def read_widget(self, config_name):
+        '''
+        Fetch a single configuration widget, including its current choices, directly from the camera.
+        read_config_values() only syncs the cached values, this also picks up choice lists that changed with other settings.
+        Falls back to fetching (and caching) the full configuration tree if single-config reads are not supported.
+        Output: gphoto2 CameraWidget
+        '''
+        if self.single_config is not False:
+            try:
+                widget = self.camera.get_single_config(config_name)
+                self.single_config = True
+                return widget
+            except Exception as err:
+                if not self._not_supported(err):
+                    raise
+                if self.single_config is None:
+                    self.single_config = False
+        return self.get_widget(config_name, refresh=True)
+
+    @staticmethod
+    def _not_supported(err):
+        '''Check if an error means that a gphoto2 function (e.g. gp_camera_get_single_config or gp_camera_file_read) is not available in this gphoto2 build or camera driver.'''
+        if isinstance(err, AttributeError): # python-gphoto2 built without the function
+            return True
+        return isinstance(err, gp.GPhoto2Error) and err.code == gp.GP_ERROR_NOT_SUPPORTED
+
+    def refresh_config(self, config=None):
+        '''
+        Fetch the full configuration tree from the camera (or use the given, already fetched tree) and rebuild the name->widget index.
+        All getters read from this cache, so one USB fetch serves any number of subsequent reads.
+        Output: the configuration tree (gphoto2 CameraWidget)
+        '''
+        if config is None:
+            config = self.camera.get_config()
+        self.config = config
+        self._config_index = {}
+        self._index_config(config)
+        self._config_time = time.monotonic()
+        self._config_stale = False
+        self._stale_widgets = {} # widgets the camera reported as changed since they were last read, with the time of the report
+        self._read_times = {} # when single widgets were last read (time.monotonic), newer than _config_time
+        self._unmapped_change = None # when the camera last reported a change of a property that could not be matched to a widget
+        return self.config
+
+    def _index_config(self, widget):
+        '''Recursively walk a configuration tree and add every widget to the name->widget index.'''
+        for i in range(widget.count_children()):
+            child = widget.get_child(i)
+            self._config_index[child.get_name()] = child
+            self._index_config(child)
+
+    def invalidate_config(self):
+        '''Mark the cached configuration as outdated, the next read will fetch a fresh tree from the camera.'''
+        self._config_stale = True
+
+    def _on_config_changed(self, event):
+        '''
+        Event pump callback for property change events: mark only the affected widget as outdated, see get_widget().
+        Only an event that reports the value the cache already holds (e.g. the echo of a write confirmed with confirm_config()) is ignored,
+        events without a value always mark the widget, one single-widget read is cheaper than missing a change.
+        '''
+        code, config_name, value = parse_property_event(event.data)
+        if config_name is None:
+            config_name = EOS_PROPERTY_WIDGETS.get(code)
+        if config_name is None:
+            self._unmapped_change = time.monotonic() # some other property (e.g. the number of available shots) changed
+            return
+        widget = self._config_index.get(config_name)
+        if widget is None:
+            return
+        if value is not None and str(widget.get_value()) == value:
+            return
+        self._stale_widgets[config_name] = time.monotonic()
+
+    def widget_is_fresh(self, config_name):
+        '''
+        Check whether a single cached widget can still be trusted: the camera has not reported a change of it since it was last read.
+        Changes of properties that can't be matched to a widget outdate all widgets not listed in EOS_PROPERTY_WIDGETS.
+        '''
+        if config_name in self._stale_widgets:
+            return False
+        if self._unmapped_change is None or config_name in EOS_PROPERTY_WIDGETS.values():
+            return True
+        return self._read_times.get(config_name, self._config_time) > self._unmapped_change
+
+    def config_is_fresh(self):
+        '''
+        Check whether the cached configuration can still be trusted.
+        The cache expires after config_ttl seconds (if set) or when a write failed. Property changes reported by the camera only outdate
+        the affected widgets, see widget_is_fresh().
+        '''
+        if self._config_stale:
+            return False
+        if self.config_ttl is None:
+            return True
+        return time.monotonic() - self._config_time < self.config_ttl
+
+    def get_widget(self, config_name, refresh=False):
+        '''
+        Look up a named configuration widget in the cached configuration tree.
+        The tree is only fetched from the camera again if the cache is outdated or refresh=True.
+        A widget the camera reported as changed is re-read on its own (see read_config_values()).
+        Input: string, name of the configuration, refresh=bool to force a new fetch
+        Output: gphoto2 CameraWidget
+        '''
+        if refresh or not self.config_is_fresh():
+            self.refresh_config()
+        elif config_name in self._config_index and not self.widget_is_fresh(config_name):
+            self.read_config_values([config_name])
+        return self._config_index[config_name]
+
     def list_all_config(self):
         '''
         List all available configuration options communicated via USB and supported by gphoto2, including those not (yet) implemented in this class.
         Output: List of strings
         '''
-        return [el[0] for el in gp.check_result(gp.gp_camera_list_config(self.camera))]
+        return [el[0] for el in self.camera.list_config()]
     
     def get_camera_mode(self):
         '''
         Detect whether the physical switch on the camera is set to photo or video mode
         Output: int 0 == PHOTO, 1 == VIDEO
         '''
-        switch = gp.check_result(gp.gp_widget_get_child_by_name(self.config, 'eosmovieswitch'))
+        switch = self.get_widget('eosmovieswitch')
         value = gp.check_result(gp.gp_widget_get_value(switch))
         return int(value)
     
+    def choice_cache_key(self):
+        '''
+        Identify the current camera set-up for the choice cache: the available choices depend on the body (model, serial number, firmware),
+        the attached lens, the auto-exposure mode (e.g. no shutter speeds in Av), and the mode.
+        Output: string
+        '''
+        parts = []
+        for names in [('cameramodel', 'model'), ('serialnumber',), ('deviceversion', 'firmwareversion'), ('lensname',), ('autoexposuremodedial', 'autoexposuremode')]:
+            value = 'unknown'
+            for name in names:
+                try:
+                    value = str(self.get_widget(name).get_value())
+                    break
+                except KeyError:
+                    continue
+            parts.append(value)
+        parts.append(str(self.mode))
+        return '|'.join(parts)
+
+    def discover_choices(self):
+        '''
+        Read the aperture, shutter speed and ISO choices from the camera's configuration widgets.
+        Settings the camera reports no numeric choices for fall back to the R5 C defaults in FALLBACK_CHOICES.
+        Output: dict {config name: choice list}, list of the config names that fell back to the defaults
+        '''
+        discovered = {}
+        fallback = []
+        for config_name in ['aperture', 'shutterspeed', 'iso']:
+            choices = []
+            if config_name != 'iso' or self.mode == 0: # ISO can only be set in PHOTO mode
+                try:
+                    choices = parse_choices(config_name, self.read_widget(config_name).get_choices())
+                except (KeyError, gp.GPhoto2Error):
+                    pass
+                if not choices:
+                    print(f"Camera reports no choices for {config_name}, using the R5 C defaults")
+                    choices = list(FALLBACK_CHOICES[self.mode][config_name])
+                    fallback.append(config_name)
+            discovered[config_name] = choices
+        return discovered, fallback
+
+    def load_choices(self, refresh=False):
+        '''
+        Set the aperture, shutter speed and ISO choice lists and their lookup tables for the current body, lens and mode.
+        The choices are read from the cache file (self.choice_cache) if this combination was seen before, otherwise (or if refresh=True)
+        they are discovered from the camera and added to the cache. Choice lists that fell back to the R5 C defaults are never cached,
+        so they are discovered again next time. Call this again with refresh=True after changing the lens.
+        Output: dict {config name: choice list}
+        '''
+        key = self.choice_cache_key()
+        choices = None if refresh else self._read_choice_cache().get(key)
+        if choices is None:
+            choices, fallback = self.discover_choices() # camera I/O, runs without the lock so that the cameras of a rig discover in parallel
+            if self.choice_cache is not None and not fallback:
+                with _choice_cache_lock: # cameras of a rig are initialised concurrently and share the cache file
+                    cache = self._read_choice_cache() # merge with entries other cameras added in the meantime
+                    cache[key] = choices
+                    try:
+                        os.makedirs(os.path.dirname(self.choice_cache) or '.', exist_ok=True)
+                        save_manifest(cache, self.choice_cache)
+                    except OSError as err:
+                        print(f"Could not write choice cache {self.choice_cache}: {err}")
+        self.aperture_choices = choices['aperture']
+        self.shutter_choices = choices['shutterspeed']
+        self.iso_choices = choices['iso']
+        self.build_choice_tables()
+        return choices
+
+    def _read_choice_cache(self):
+        '''Helper function to read the choice cache file, output: dict {choice_cache_key(): choices}, empty if there is no cache (file).'''
+        if self.choice_cache is None:
+            return {}
+        with _choice_cache_lock:
+            try:
+                return load_manifest(self.choice_cache)
+            except (OSError, ValueError) as err:
+                print(f"Could not read choice cache {self.choice_cache}: {err}")
+                return {}
+
+    def build_choice_tables(self):
+        '''
+        Parse the aperture, shutter speed and ISO choice lists into sorted lookup tables (see ChoiceTable).
+        Called by load_choices(), the pick_*_value() helpers only use these tables.
+        '''
+        self.aperture_table = ChoiceTable(self.aperture_choices)
+        self.shutter_table = ChoiceTable(self.shutter_choices)
+        self.iso_table = ChoiceTable(self.iso_choices)
+        return
+
+    def close(self):
+        '''Release the USB connection to the camera, e.g. before handing it over to another process.'''
+        self.events.stop()
+        self.camera.exit()
+        return
+
+    def get_serial_number(self):
+        '''Get the camera's serial number (string), useful to tell files from several cameras apart.'''
+        try:
+            return str(self.get_widget('serialnumber').get_value())
+        except KeyError:
+            return 'unknown'
+
     def sync_date_time(self):
         '''
         Sync the camera's date and time with the connected computer's date and time.
@@ -153,16 +732,18 @@ class EOS(object):
         self.set_config_fire_and_forget('syncdatetimeutc', 0)
         return
 
-    def get_config(self, config_name=None):
+    def get_config(self, config_name=None, refresh=False):
         '''
         Get the current value and all choices of a named configuration, including those not specifically implemented in this class (yet).
-        Input: string, name of the configuration
+        Input: string, name of the configuration, refresh=bool to bypass the configuration cache
         Output: tuple (string: current value, list of strings: choices)
         '''
         if type(config_name)==str:
             config_name = config_name.lower()
-            if config_name in self.list_all_config():
-                conf = gp.check_result(gp.gp_widget_get_child_by_name(self.config, config_name))
+            if refresh or not self.config_is_fresh():
+                self.refresh_config()
+            if config_name in self._config_index:
+                conf = self._config_index[config_name]
                 value = gp.check_result(gp.gp_widget_get_value(conf))
                 try:
                     choices = list(conf.get_choices())
@@ -233,23 +814,26 @@ class EOS(object):
             return None
         return files
     
-    def download_file(self, camera_path, target_file=None):
-        '''Download a specific file from the camera storage medium to the target file path on the PC.'''
+    def download_file(self, camera_path, target_file=None, progress=None):
+        '''
+        Download a specific file from the camera storage medium to the target file path on the PC.
+        The file is streamed in chunks (see stream_file()), so even multi-GB videos don't need to fit into memory.
+        Optionally pass progress(bytes_done, bytes_total, seconds_elapsed) to follow the transfer.
+        '''
 
         if type(camera_path)==str:
             if len(camera_path) > 0 and camera_path[0] == '/' and camera_path[-1] != '/':
                 folder, name = os.path.split(camera_path)
+                if target_file is None:
+                    target_file = os.path.join('./', name)
                 try:
-                    cam_file = self.camera.file_get(folder, name, gp.GP_FILE_TYPE_NORMAL)
+                    self.stream_file(folder, name, target_file, progress=progress)
                 except Exception as err:
                     if '-108' in str(err):
                         print(f"File {camera_path} not found")
                     else:
-                        print('Unhandled gphoto2 error: ' + err)
+                        print(f'Unhandled gphoto2 error: {err}')
                     return None
-                if target_file is None:
-                    target_file = os.path.join('./', name)
-                cam_file.save(target_file)
                 return target_file
             else:
                 print(f"Please provide the absolute file path. Path {camera_path} must be a string starting with '/' and ending with the file name")
@@ -258,6 +842,115 @@ class EOS(object):
             print(f"Camera path must be a string")
             return None
     
+    def stream_file(self, folder, name, target_file, chunk_size=8*1024*1024, progress=None):
+        '''
+        Helper function to download a file from the camera in fixed-size chunks (gp_camera_file_read) straight into a preallocated, memory-mapped target file.
+        Peak memory use stays at about one chunk regardless of the file size.
+        The data is written to <target_file>.part first and only renamed to target_file when complete, a failed transfer leaves no file behind.
+        Falls back to downloading the whole file at once (gp_camera_file_get) if the camera driver does not support partial reads.
+        Input: folder and name on the camera, target_file=local path, chunk_size=bytes per USB read, progress=optional callable(bytes_done, bytes_total, seconds_elapsed)
+        Output: dict with the number of bytes, the transfer duration (s) and the throughput (MB/s)
+        '''
+        start = time.monotonic()
+        size = self.camera.file_get_info(folder, name).file.size
+        part_file = target_file + '.part' # only renamed to target_file once complete, so an interrupted transfer never looks like a finished file
+        try:
+            try:
+                with open(part_file, 'w+b') as f:
+                    f.truncate(size)
+                    if size > 0:
+                        with mmap.mmap(f.fileno(), size) as mm:
+                            buffer = memoryview(mm)
+                            try:
+                                offset = 0
+                                while offset < size:
+                                    with buffer[offset:offset + chunk_size] as chunk: # released right away, even if the read fails
+                                        n = self.camera.file_read(folder, name, gp.GP_FILE_TYPE_NORMAL, offset, chunk)
+                                    if n <= 0:
+                                        raise CameraError(f"Camera returned no data for {folder}/{name} at byte {offset} of {size}")
+                                    offset += n
+                                    if progress is not None:
+                                        progress(offset, size, time.monotonic() - start)
+                            finally:
+                                buffer.release()
+            except Exception as err:
+                if not self._not_supported(err):
+                    raise
+                cam_file = self.camera.file_get(folder, name, gp.GP_FILE_TYPE_NORMAL)
+                cam_file.save(part_file)
+                if os.path.getsize(part_file) != size:
+                    raise CameraError(f"Size mismatch for {folder}/{name}: expected {size} bytes, got {os.path.getsize(part_file)}")
+                if progress is not None:
+                    progress(size, size, time.monotonic() - start)
+            os.replace(part_file, target_file)
+        except BaseException:
+            if os.path.exists(part_file):
+                os.remove(part_file)
+            raise
+        duration = time.monotonic() - start
+        self.last_transfer_time = duration
+        return {'bytes': size, 'seconds': duration, 'MB/s': size / 1e6 / duration if duration > 0 else None}
+
+    def sync_media(self, dest, path='/store_00020001/DCIM', manifest_name='.sync_manifest.json', full_check=False):
+        '''
+        Bulk-download all media files from the camera to the local directory dest, skipping files that are already there (similar to rsync).
+        The folder structure below path is kept, e.g. dest/100CANON/IMG_0001.CR3.
+        A manifest (JSON, stored in dest) records name, size and mtime of every completed file, so an interrupted sync simply resumes:
+        files are streamed to *.part first (see stream_file()) and only renamed and added to the manifest once complete,
+        so even multi-GB video clips never need to fit into memory.
+        Input: dest=string, path=camera directory to sync, full_check=bool to re-check files already in the manifest against the camera's file info
+        Output: success=bool, downloaded=list of local file paths, msg=string
+        '''
+        camera_files = self.list_files(path)
+        if camera_files is None:
+            return False, [], f"Could not list files in {path}"
+
+        os.makedirs(dest, exist_ok=True)
+        manifest_file = os.path.join(dest, manifest_name)
+        manifest = load_manifest(manifest_file)
+        downloaded = []
+        errors = []
+        skipped = 0
+        try:
+            for camera_path in camera_files:
+                local_file = os.path.join(dest, os.path.relpath(camera_path, path))
+                known = manifest.get(camera_path)
+                if known is not None and not full_check and os.path.exists(local_file) and os.path.getsize(local_file) == known['size']:
+                    skipped += 1
+                    continue
+
+                folder, name = os.path.split(camera_path)
+                file_info = self.camera.file_get_info(folder, name)
+                info = {'size': file_info.file.size, 'mtime': file_info.file.mtime}
+                if known == info and os.path.exists(local_file) and os.path.getsize(local_file) == info['size']:
+                    skipped += 1
+                    continue
+                if known is None and os.path.exists(local_file) and os.path.getsize(local_file) == info['size']: # already there, e.g. from an older sync without manifest
+                    manifest[camera_path] = info
+                    skipped += 1
+                    continue
+
+                os.makedirs(os.path.dirname(local_file), exist_ok=True)
+                try:
+                    self.stream_file(folder, name, local_file)
+                except Exception as err:
+                    print(f"Could not download {camera_path}: {err}")
+                    errors.append((camera_path, err))
+                    continue
+                manifest[camera_path] = info
+                downloaded.append(local_file)
+                if len(downloaded) % 20 == 0: # persist progress regularly, so an interruption loses as little as possible
+                    save_manifest(manifest, manifest_file)
+        finally:
+            save_manifest(manifest, manifest_file)
+
+        msg = f"{len(downloaded)} files downloaded, {skipped} already up to date"
+        if errors:
+            msg += f", {len(errors)} failed"
+            print(msg)
+            return False, downloaded, msg
+        return True, downloaded, msg
+
     def manual_focus(self, value=3):
         '''
         Manually drive the lens focus nearer or further in increments of three different sizes.
@@ -265,6 +958,7 @@ class EOS(object):
         To bring the focus point nearer, use [0,1,2] for [small, medium, large] increments.
         To bring the focus point further, use [4,5,6] for [small, medium, large] increments.
         Note that the camera does NOT report an avilable range or when the maximum or minimum focus distance has been reached.
+        The drive returns right away, use wait_for_focus_settled() to find out when the lens has stopped moving.
         Input: int 0-6
         Output: string describing the action taken
         '''
@@ -284,53 +978,80 @@ class EOS(object):
             return msg
         
         self.set_config_fire_and_forget('manualfocusdrive', choices[value])
-        self.set_config_fire_and_forget('manualfocusdrive', 'None') # reset to neutral
+        # manualfocusdrive is an action, not a state: the camera always reports 'None' and writing 'None' does nothing,
+        # so resetting the cached widget is enough to make the next step (and any full config push) behave, without a second USB write
+        self.get_widget('manualfocusdrive').set_value('None')
         return msg
+
+    def wait_for_focus_settled(self, frames, reference, tolerance=0.05, timeout=2, roi=None):
+        '''
+        After driving the focus (manual_focus()), wait until the lens has stopped moving by watching the sharpness of the preview frames
+        (see preview_sharpness()) instead of sleeping for a fixed time. Frames that still show the old position must not confirm the step,
+        so the focus only counts as settled once the sharpness has changed from the reference (the sharpness before the step) by more than
+        the relative tolerance, and then two consecutive frames differ by less than it.
+        If the sharpness never changes (e.g. a featureless scene), the step is taken as done once the timeout has passed.
+        Input: frames=generator from preview_frames(), reference=float, tolerance=float, timeout=seconds, roi=see preview_sharpness()
+        Output: sharpness of the last frame (float), seconds waited, bool whether the focus settled (False if it was still changing at the timeout)
+        '''
+        start = time.perf_counter()
+        previous = None
+        moved = False
+        while True:
+            sharpness = preview_sharpness(next(frames), roi)
+            if not moved:
+                moved = abs(sharpness - reference) > tolerance * max(reference, 1e-6) # the first frame taken after the drive took effect
+            elif abs(sharpness - previous) <= tolerance * max(previous, 1e-6):
+                return sharpness, time.perf_counter() - start, True
+            if time.perf_counter() - start > timeout:
+                return sharpness, time.perf_counter() - start, not moved
+            previous = sharpness
     
-    def get_capture_parameters(self):
-        '''Get the current values for aperture, iso, shutter speed, and continuous auto focus.'''
+    def get_capture_parameters(self, refresh=False):
+        '''
+        Get the current values for aperture, iso, shutter speed, and continuous auto focus.
+        All four are read from the same cached configuration, refresh=True forces one new fetch from the camera first.
+        '''
+        if refresh or not self.config_is_fresh():
+            self.refresh_config()
         aperture = self.get_aperture()
         shutterspeed = self.get_shutterspeed()
         c_AF = self.get_continuous_AF()
         iso = self.get_iso()
         return aperture, iso, shutterspeed, c_AF
     
-    def get_aperture(self):
+    def get_aperture(self, refresh=False):
         '''Get the current aperture (f-number) setting.'''
-        self.config = self.camera.get_config()
-        aperture = gp.check_result(gp.gp_widget_get_child_by_name(self.config, 'aperture'))
+        aperture = self.get_widget('aperture', refresh)
         current = 'AUTO' if aperture.get_value() == 'Unknown value 00ff' or aperture.get_value() == 'implicit auto' else aperture.get_value()
         return current
     
-    def get_shutterspeed(self):
+    def get_shutterspeed(self, refresh=False):
         '''Get the current shutter speed setting.'''
-        self.config = self.camera.get_config()
-        shutterspeed = gp.check_result(gp.gp_widget_get_child_by_name(self.config, 'shutterspeed'))
+        shutterspeed = self.get_widget('shutterspeed', refresh)
         current = 'AUTO' if shutterspeed.get_value() == 'bulb' or shutterspeed.get_value() == 'auto' else shutterspeed.get_value()
         return current
     
-    def get_continuous_AF(self):
+    def get_continuous_AF(self, refresh=False):
         '''Get the current continuous auto focus setting.'''
-        self.config = self.camera.get_config()
         if self.mode == 0:
             config = 'continuousaf'
         else:
             config = 'movieservoaf'
-        c_AF = gp.check_result(gp.gp_widget_get_child_by_name(self.config, config))
+        c_AF = self.get_widget(config, refresh)
         return c_AF.get_value()
     
-    def get_iso(self):
+    def get_iso(self, refresh=False):
         '''Get the current ISO setting.'''
-        self.config = self.camera.get_config()
         if self.mode == 1:
             #TODO: Double check if there is no way to get this value in VIDEO mode
             return None
-        iso = gp.check_result(gp.gp_widget_get_child_by_name(self.config, 'iso'))
+        iso = self.get_widget('iso', refresh)
         current = 'AUTO' if iso.get_value() == 'Auto' else iso.get_value()
         return current
 
     def set_capture_parameters(self, aperture=None, iso=None, shutterspeed=None, c_AF=None):
         '''Set the aperture, iso, shutter speed, and continuous auto focus.'''
+        self.ensure_setup()
         msgs = ''
         configs = []
         values = []
@@ -348,7 +1069,12 @@ class EOS(object):
                 values.append(val)
 
         #self.set_aperture(ap_val)
-        success = self.set_config_and_confirm(configs, values)
+        try:
+            success = self.set_config_and_confirm(configs, values)
+        except CameraError as err:
+            print(err)
+            msgs += f'... Capture parameters not confirmed: {err} '
+            return msgs
         msgs += '... Capture parameters set. '
         return msgs
     
@@ -357,11 +1083,16 @@ class EOS(object):
         Use this if you want to change ONLY the aperture (f-number).
         Always returns the (new) currently active setting and potential error messages.
         '''
+        self.ensure_setup()
         corrected_value, msg = self.pick_aperture_value(value)
         if corrected_value is None:
             return self.get_aperture(), msg
         #self.set_config_fire_and_forget('aperture', corrected_value)
-        self.set_config_and_confirm(['aperture'], [corrected_value])
+        try:
+            self.set_config_and_confirm(['aperture'], [corrected_value])
+        except CameraError as err:
+            print(err)
+            msg += str(err)
         current = self.get_aperture()
         return current, msg
         
@@ -370,10 +1101,15 @@ class EOS(object):
         Use this if you want to change ONLY the shutter speed/ exposure time.
         Always returns the (new) currently active setting and potential error messages.
         '''
+        self.ensure_setup()
         corrected_value, msg = self.pick_shutterspeed_value(value)
         if corrected_value is None:
             return self.get_shutterspeed(), msg
-        self.set_config_and_confirm(['shutterspeed'], [corrected_value])
+        try:
+            self.set_config_and_confirm(['shutterspeed'], [corrected_value])
+        except CameraError as err:
+            print(err)
+            msg += str(err)
         current = self.get_shutterspeed()
         return current, msg
 
@@ -382,10 +1118,15 @@ class EOS(object):
         Use this if you want to change ONLY the continuous Auto-focus functionality.
         Always returns the (new) currently active setting and potential error messages.
         '''
+        self.ensure_setup()
         corrected_value, config, msg = self.pick_continuous_AF_value(value)
         if value is None:
             return self.get_continuous_AF(), msg
-        self.set_config_and_confirm([config], [corrected_value])
+        try:
+            self.set_config_and_confirm([config], [corrected_value])
+        except CameraError as err:
+            print(err)
+            msg += str(err)
         current = self.get_continuous_AF()
         return current, msg
 
@@ -417,8 +1158,8 @@ class EOS(object):
                 return None, msg
 
             # if the exact value specified is not supported, use the closest option
-            if value not in self.aperture_choices:
-                closest = min(self.aperture_choices, key=lambda x: abs(x - value))
+            if value not in self.aperture_table.values:
+                closest = self.aperture_table.closest(value)
                 msg = f'Aperture of {value} not supported, using closest option (or reformatting) to {closest}'
                 print(msg)
                 value = closest
@@ -444,20 +1185,17 @@ class EOS(object):
             else:
                 value = 'auto'
         else:
-            if value not in self.shutter_choices:
-                num_choices = [eval(choice) for choice in self.shutter_choices] # convert all string options to numeric values                
-                if type(value) == int or type(value) == float:
-                    num_value = value
-                else:
-                    try:
-                        num_value = eval(value)
-                    except NameError:
-                        msg = f"Value {value} not supported. Please use string 'AUTO' or a number (int/float/numeric string)."
-                        print(msg)
-                        print('Supported numeric values: ', self.shutter_choices)
-                        return None, msg
-
-                closest = self.shutter_choices[num_choices.index(min(num_choices, key=lambda x: abs(x - num_value)))]
+            if value in self.shutter_table:
+                value = self.shutter_table.index[str(value)] # e.g. int 25 -> '25'
+            else:
+                num_value = parse_numeric(value)
+                if num_value is None:
+                    msg = f"Value {value} not supported. Please use string 'AUTO' or a number (int/float/numeric string)."
+                    print(msg)
+                    print('Supported numeric values: ', self.shutter_choices)
+                    return None, msg
+
+                closest = self.shutter_table.closest(num_value)
                 msg = f'Shutterspeed of {value} not supported, using closest (or reformatting) option of {closest}'
                 print(msg)
                 value = closest
@@ -510,6 +1248,7 @@ class EOS(object):
                 target_path: string, path to the directory where the image will be saved
         Output: file_path: string, msg: string
         '''
+        self.ensure_setup()
 
         # Check if the camera is in the correct mode
         if self.mode == 1:
@@ -521,17 +1260,14 @@ class EOS(object):
         # Change capture parameters if requested
         input_params = [aperture, iso, shutterspeed, c_AF]
         if any(param is not None for param in input_params): # if any parameters are specified
-            current_params = self.get_capture_parameters()
-            current_params = list(current_params)
-            target_params = [current_params[i] if item is None else item for i, item in enumerate(input_params)]
-
-            msg = self.set_capture_parameters(*target_params)
+            # parameters left as None stay unchanged, and only values that differ from the current state are sent
+            msg = self.set_capture_parameters(*input_params)
             msgs += msg
 
         # Trigger the capture
         success, file_path, msg = self.capture_immediate(download=download, target_path=target_path)
         msgs += msg
-        time.sleep(0.8) # wait a moment to allow the camera to reset after the capture
+        self.wait_until_ready() # return as soon as the camera can take the next capture
 
         return file_path, msgs
     
@@ -550,9 +1286,7 @@ class EOS(object):
         # Change capture parameters if requested
         input_params = [aperture, iso, shutterspeed, c_AF]
         if any(param is not None for param in input_params):
-            [current_params] = self.get_capture_parameters()
-            new_params = [current_params[i] if item is None else item for i, item in enumerate(input_params)]
-            msg = self.set_capture_parameters(*new_params)
+            msg = self.set_capture_parameters(*input_params) # parameters left as None stay unchanged
             msgs += msg
 
         if self.mode == 0:
@@ -575,7 +1309,11 @@ class EOS(object):
             print("Camera must be in PHOTO mode to set exposure mode to manual")
             return False
         
-        self.set_config_and_confirm(['autoexposuremodedial'], ['Fv']) # 'Fv' == Canon's 'Flexible-Priority Auto Exposure', useful for manual access
+        try:
+            self.set_config_and_confirm(['autoexposuremodedial'], ['Fv']) # 'Fv' == Canon's 'Flexible-Priority Auto Exposure', useful for manual access
+        except CameraError as err:
+            print(err)
+            return False
         return True
     
     def set_save_target(self):
@@ -586,7 +1324,11 @@ class EOS(object):
             print("Camera must be in PHOTO mode to set the save target for still images")
             return False
         
-        self.set_config_and_confirm(['capturetarget'], ['Memory card']) # '1' == Memory card
+        try:
+            self.set_config_and_confirm(['capturetarget'], ['Memory card']) # '1' == Memory card
+        except CameraError as err:
+            print(err)
+            return False
         return
     
     def pick_iso_value(self, value='AUTO'):
@@ -602,19 +1344,16 @@ class EOS(object):
         if value == 'AUTO':
             value = 'Auto'
         else:
-            if type(value) == int or type(value) == float:
-                value = round(value)
-            elif type(value) == str:
-                try:
-                    value = round(eval(value))
-                except NameError:
-                    msg = f"Value {value} not supported. Please use string 'AUTO' or a number (int/float/numeric string)."
-                    print(msg)
-                    print('Supported numeric values: ', self.iso_choices)
-                    return None, msg
+            num_value = parse_numeric(value)
+            if num_value is None:
+                msg = f"Value {value} not supported. Please use string 'AUTO' or a number (int/float/numeric string)."
+                print(msg)
+                print('Supported numeric values: ', self.iso_choices)
+                return None, msg
+            value = round(num_value)
 
-            if value not in self.iso_choices:
-                closest = min(self.iso_choices, key=lambda x: abs(x - value))
+            if value not in self.iso_table:
+                closest = self.iso_table.closest(value)
                 msg = f'ISO of {value} not supported, using closest option of {closest}'
                 print(msg)
                 value = closest
@@ -627,6 +1366,7 @@ class EOS(object):
         Always returns the (new) currently active setting.
         Only supported in PHOTO mode.
         '''
+        self.ensure_setup()
         msg = ''
         if self.mode == 1:
             msg = "Camera must be in PHOTO mode to manually set ISO."
@@ -636,7 +1376,11 @@ class EOS(object):
         corrected_value, msg = self.pick_iso_value(value)
         if corrected_value is None:
             return self.get_iso(), msg
-        self.set_config_and_confirm(['iso'], [corrected_value])
+        try:
+            self.set_config_and_confirm(['iso'], [corrected_value])
+        except CameraError as err:
+            print(err)
+            msg += str(err)
         current = self.get_iso()
         return current, msg
 
@@ -653,7 +1397,7 @@ class EOS(object):
             print(msg)
             return None, None, msg
         
-        im_format = gp.check_result(gp.gp_widget_get_child_by_name(self.config, 'imageformat'))
+        im_format = self.get_widget('imageformat')
         choices = list(im_format.get_choices())
         if list_choices:
             print(choices)
@@ -667,7 +1411,12 @@ class EOS(object):
                 print(msg)  
                 return im_format.get_value(), choices, msg
         
-        self.set_config_and_confirm(['imageformat'], [value])
+        try:
+            self.set_config_and_confirm(['imageformat'], [value])
+        except CameraError as err:
+            msg = str(err)
+            print(msg)
+            return self.get_widget('imageformat').get_value(), choices, msg
         return value, choices, msg
     
     def trigger_AF(self, duration=0.2):
@@ -706,7 +1455,7 @@ class EOS(object):
             msg = f"AF point {x},{y} not supported, please input values as integers."
             return None, msg
         
-        AF_point = gp.check_result(gp.gp_widget_get_child_by_name(self.config, 'eoszoomposition'))
+        AF_point = self.get_widget('eoszoomposition')
         if 0 <= x <= 8192 and 0 <= y <= 5464:
             self.set_config_fire_and_forget('eoszoomposition', f"{x},{y}")
             return f'{x},{y}', msg
@@ -714,11 +1463,13 @@ class EOS(object):
             msg = f"AF point {x},{y} not supported, please input values between according to your selected image resolution, normally between 0 and 8192 for x and 0 and 5464 for y."
             return AF_point.get_value(), msg
     
-    def show_live_preview(self, file_path='./live_preview.jpg'):
+    def show_live_preview(self, file_path=None):
         '''
         Display preview frames on the PC until the user interrupts the preview with 'q'.
         Usually 960x640 at around 15 fps.
-        The images are NOT saved on the device or pc.
+        The images are NOT saved on the device or pc, frames are decoded straight from memory.
+        file_path is deprecated and ignored, it is only accepted so that existing calls keep working.
+        Frames are captured on a background thread (see preview_service()), so a slow display does not slow down the capture.
         Note that the live preview is not available during capture. This function temporarily blocks the USB I/O. Stop the live preview before changing configurations or starting a capture.
         Only supported in PHOTO mode.'''
         if self.mode == 1:
@@ -726,19 +1477,27 @@ class EOS(object):
             print(msg)
             return msg
         
-        from PIL import Image
+        if file_path is not None:
+            warnings.warn("show_live_preview(file_path=...) is deprecated and ignored, frames are no longer written to disk", DeprecationWarning, stacklevel=2)
         import matplotlib.pyplot as plt
         from matplotlib.animation import FuncAnimation 
         
-        self.capture_preview(target_file=file_path)
-        im = Image.open(file_path)
+        service = self.preview_service(buffer_size=2).start()
+        frame = service.wait_next(timeout=5)
+        if frame is None:
+            service.stop()
+            msg = "No preview frame received from the camera"
+            print(msg)
+            return msg
         ax1 = plt.subplot(111)
-        im1 = ax1.imshow(im)
+        im1 = ax1.imshow(decode_preview(frame.data))
+        shown = [frame.index]
 
         def update_live_view(i):
-            self.capture_preview(target_file=file_path)
-            im = Image.open(file_path)
-            im1.set_data(im)
+            frame = service.latest()
+            if frame is not None and frame.index != shown[0]: # only decode frames that were not displayed yet
+                im1.set_data(decode_preview(frame.data))
+                shown[0] = frame.index
 
         ani = FuncAnimation(plt.gcf(), update_live_view, interval=50)
 
@@ -749,6 +1508,8 @@ class EOS(object):
         cid = plt.gcf().canvas.mpl_connect("key_press_event", close)
         print('Press q to quit')
         plt.show()
+        stats = service.stop()
+        print(f"Live preview captured {stats['captured']} frames")
         return
 
     def capture_preview(self, target_file='./preview.jpg'):
@@ -762,155 +1523,739 @@ class EOS(object):
             print(error_msg)
             return False, error_msg
         
-        camera_file = gp.check_result(gp.gp_camera_capture_preview(self.camera))
+        camera_file = self.camera.capture_preview()
         camera_file.save(target_file)
         return True, 'saved to computer'
 
-    def capture_immediate(self, download=True, target_path='.'):
+    def preview_service(self, buffer_size=8):
+        '''
+        Create a background preview capture service for this camera (see preview.PreviewService).
+        Start it with .start() or use it as a context manager, then fetch frames with .latest() or .wait_next().
+        Only supported in PHOTO mode.
+        Output: PreviewService (not started yet)
+        '''
+        return PreviewService(self, buffer_size=buffer_size)
+
+    def preview_frames(self, max_frames=None, decode=False, pool_size=4):
+        '''
+        Generator that continuously captures preview frames (i.e. viewfinder frames, with the mirror up) and yields them from memory, without touching the disk.
+        Each frame is a memoryview over the JPEG data held by a gphoto2 CameraFile, so no bytes are copied.
+        The CameraFiles come from a pool of pool_size objects that is cycled through, i.e. a yielded memoryview stays valid
+        for the next pool_size-1 frames. Copy the data (bytes(frame)) if you need to keep it for longer.
+        Only supported in PHOTO mode.
+        Input: max_frames=int or None (endless), decode=bool to yield NumPy arrays (height x width x 3) instead, pool_size=int
+        Output: generator of memoryviews (JPEG data) or NumPy arrays
+        '''
+        if self.mode == 1:
+            print("Camera must be in PHOTO mode to capture previews")
+            return
+
+        pool = [gp.CameraFile() for _ in range(pool_size)]
+        reuse = True # fill the pooled CameraFiles in place, if supported by python-gphoto2
+        count = 0
+        while max_frames is None or count < max_frames:
+            camera_file = pool[count % pool_size]
+            if reuse:
+                try:
+                    self.camera.capture_preview(camera_file)
+                except TypeError:
+                    reuse = False
+            if not reuse:
+                camera_file = self.camera.capture_preview()
+                pool[count % pool_size] = camera_file # keep it alive as long as its memoryview may be in use
+            frame = memoryview(camera_file.get_data_and_size())
+            count += 1
+            yield decode_preview(frame) if decode else frame
+
+    def trigger_capture(self, timeout=5, before_trigger=None, busy_retries=5):
+        '''
+        Helper function to take one immediate capture: press the shutter (eosremoterelease), wait for the camera's new file event and release the shutter again.
+        The new file event is expected before the trigger is written and the expectation is always withdrawn afterwards, and the shutter is always released
+        (in the cache as well, so that no later full config push can fire it), even if the trigger write or before_trigger fails.
+        A failed capture therefore never swallows the file event of the next capture.
+        The camera lock is held from before_trigger (e.g. a barrier wait) until the trigger write has returned, so the event pump cannot delay the trigger.
+        Input: timeout=seconds to wait for the new file, before_trigger=optional callable, busy_retries=see _retry_if_busy()
+        Output: the new file Event (None on timeout), dict of host timestamps (time.perf_counter) trigger_send and trigger_sent
+        '''
+        self.get_widget('eosremoterelease') # make sure the cache is fresh before taking the camera lock
+        def push_trigger(value):
+            self._config_index['eosremoterelease'].set_value(value)
+            return self.push_config(['eosremoterelease'])
+
+        new_file = self.events.expect(FILE_ADDED) # register before triggering, so the event cannot be missed
+        times = {'trigger_send': None, 'trigger_sent': None}
+        completed = False
+        try:
+            with self.camera.lock:
+                if before_trigger is not None:
+                    before_trigger()
+                times['trigger_send'] = time.perf_counter()
+                self._retry_if_busy(lambda: push_trigger('Immediate'), 'triggering capture', busy_retries) # trigger shutter
+                times['trigger_sent'] = time.perf_counter()
+            event = self.wait_for_event(FILE_ADDED, new_file, timeout)
+            completed = True
+        finally:
+            self.events.cancel(FILE_ADDED, new_file) # does nothing if the event has arrived
+            self._config_index['eosremoterelease'].set_value('Release Full')
+            if times['trigger_send'] is not None: # the trigger write may have reached the camera
+                try:
+                    self._retry_if_busy(lambda: push_trigger('Release Full'), 'releasing the shutter', busy_retries) # reset shutter
+                except CameraError as err:
+                    if completed:
+                        raise
+                    print(err)
+        return event, times
+
+    def capture_immediate(self, download=True, target_path='.', timeout=5):
         '''
         Taken an immeditate capture, triggering the shutter but without triggering the auto-focus first.
         Image is saved to camera's storage device first, optionally download the image to the target path. 
-        The file name will follow the camera's set naming convention.
+        The file name will follow the camera's set naming convention, the path on the camera is stored in self.last_camera_path
+        and the time at which the camera announced the new file in self.last_capture_time. timeout=seconds to wait for the new file.
         Returns a boolean indicating success, the file path if saved to PC, and a message.
         Only supported in PHOTO mode.
         '''
+        self.ensure_setup()
 
         if self.mode == 1:
             error_msg = "Camera must be in PHOTO mode to capture static images"
             print(error_msg)
             return False, None, error_msg
         
-        self.set_config_fire_and_forget('eosremoterelease', 'Immediate') # trigger shutter
-        timeout = time.time() + 5
-        while True:
-            # potentially need to catch exceptions here in case the new file event is not caught by this wait loop
-            # loop times out after 10 seconds
-            event_type, event_data = self.camera.wait_for_event(1000)
-            if event_type == gp.GP_EVENT_FILE_ADDED:
-                if download:
-                    cam_file = self.camera.file_get(event_data.folder, event_data.name, gp.GP_FILE_TYPE_NORMAL)
-                    cam_file.save(target_path+'/'+event_data.name)
-                    self.set_config_fire_and_forget('eosremoterelease', 'Release Full') # reset shutter
-                    return True, target_path+'/'+event_data.name, 'downloaded'
-                else:
-                    self.set_config_fire_and_forget('eosremoterelease', 'Release Full') # reset shutter
-                    return True, None, 'saved to camera'
-            
-            elif time.time() > timeout:
-                error_msg = "Waiting for new file event timed out, capture may have failed."
-                print(error_msg)
-                self.set_config_fire_and_forget(['eosremoterelease'], ['Release Full']) # reset shutter
-                return False, None, error_msg
+        event, times = self.trigger_capture(timeout=timeout)
+        if event is None:
+            error_msg = "Waiting for new file event timed out, capture may have failed."
+            print(error_msg)
+            return False, None, error_msg
+        self.last_camera_path = event.data.folder +'/'+ event.data.name
+        self.last_capture_time = event.timestamp
+        if download:
+            self.stream_file(event.data.folder, event.data.name, target_path+'/'+event.data.name)
+            return True, target_path+'/'+event.data.name, 'downloaded'
+        return True, None, 'saved to camera'
+
+    def wait_until_ready(self, timeout=5, probe='eosmovieswitch'):
+        '''
+        Block until the camera accepts commands again (e.g. after initialisation or a capture), instead of sleeping for a fixed time.
+        First all events the camera has queued so far are dispatched, then a single cheap status widget is read;
+        while the camera is still busy it answers with I/O busy (-110), which is retried with backoff.
+        Output: seconds waited
+        '''
+        start = time.perf_counter()
+        self.events.flush(timeout)
+        retries = int(timeout / BACKOFF_MAX) + 5 # enough retries to cover the timeout with the maximum backoff
+        self._retry_if_busy(lambda: self.read_config_values([probe]), 'waiting for the camera to be ready', retries)
+        return time.perf_counter() - start
+
+    def benchmark_capture_rate(self, shots=10, download=False, target_path='.', fixed_sleep=0.8):
+        '''
+        Measure how many images per second can be taken one after another with readiness detection (wait_until_ready()),
+        compared to the previous behaviour of sleeping for a fixed time after every capture.
+        Note that this takes 2 x shots images. Only supported in PHOTO mode.
+        Output: dict with the achieved shots per second for both modes
+        '''
+        if self.mode == 1:
+            print("Camera must be in PHOTO mode to capture static images")
+            return None
+        results = {}
+        for name, wait in [('ready_detection', self.wait_until_ready), ('fixed_sleep', lambda: time.sleep(fixed_sleep))]:
+            start = time.perf_counter()
+            for _ in range(shots):
+                self.capture_immediate(download=download, target_path=target_path)
+                wait()
+            results[name] = shots / (time.perf_counter() - start)
+            print(f"{name}: {results[name]:.2f} shots per second")
+        return results
+
+    def wait_for_event(self, kind, future, timeout):
+        '''
+        Helper function to wait for an event registered with self.events.expect(kind).
+        Output: the Event (see events.Event), or None if it did not arrive within timeout seconds
+        '''
+        try:
+            return future.result(timeout)
+        except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+            self.events.cancel(kind, future)
+            return None
+
+    def drain_events(self, max_duration=0.5):
+        '''
+        Helper function to make sure all events the camera has queued so far were dispatched, before a time-critical action.
+        Old events are then no longer mistaken for new ones.
+        '''
+        self.events.flush(max_duration)
+        return
 
-    def record_preview_video(self, t=1, target_path ='.', resolution_prio=False):
+    def arm_trigger(self):
+        '''
+        Prepare an immediate capture so that releasing the shutter costs exactly one USB write:
+        the trigger widget is looked up (and the cache refreshed if needed) and pending camera events are drained beforehand.
+        Output: the cached eosremoterelease widget
+        '''
+        trigger = self.get_widget('eosremoterelease')
+        self.drain_events()
+        return trigger
+
+    def capture_synchronized(self, barrier, download=False, target_path='.', timeout=5):
+        '''
+        One camera's part of a synchronised multi-camera capture, see CameraRig.capture_synchronized().
+        The trigger is armed first, then all cameras wait at the shared barrier (threading.Barrier) and release the shutter immediately once everybody is ready.
+        Host-side timestamps are taken with time.perf_counter(), so they are comparable between cameras in the same process.
+        Only supported in PHOTO mode.
+        Output: dict with keys success, camera_path, file_path, msg, trigger_send, trigger_sent, file_added (timestamps in seconds or None)
+        '''
+        self.ensure_setup()
+        result = {'success': False, 'camera_path': None, 'file_path': None, 'msg': '', 'trigger_send': None, 'trigger_sent': None, 'file_added': None}
+        if self.mode == 1:
+            result['msg'] = "Camera must be in PHOTO mode to capture static images"
+            print(result['msg'])
+            barrier.abort() # don't keep the other cameras waiting
+            return result
+        try:
+            self.arm_trigger()
+        except Exception as err:
+            barrier.abort()
+            result['msg'] = f"Could not arm the trigger: {err}"
+            print(result['msg'])
+            return result
+
+        try:
+            # the barrier is passed while holding the camera lock, so the trigger write goes out right after the release
+            event, times = self.trigger_capture(timeout, before_trigger=lambda: barrier.wait(timeout))
+        except threading.BrokenBarrierError:
+            result['msg'] = "Synchronised capture aborted, not all cameras were ready in time"
+            print(result['msg'])
+            return result
+        except CameraError as err:
+            result['msg'] = f"Trigger failed: {err}"
+            print(result['msg'])
+            return result
+        result.update(times)
+        if event is not None:
+            result['file_added'] = event.timestamp # taken by the event pump as soon as the event arrived
+            result['camera_path'] = event.data.folder + '/' + event.data.name
+
+        if result['camera_path'] is None:
+            result['msg'] = "Waiting for new file event timed out, capture may have failed."
+            print(result['msg'])
+            return result
+        result['success'] = True
+        if download:
+            result['file_path'] = self.download_file(result['camera_path'], target_file=os.path.join(target_path, os.path.basename(result['camera_path'])))
+            result['msg'] = 'downloaded'
+        else:
+            result['msg'] = 'saved to camera'
+        return result
+
+    def record_preview_video(self, t=1, target_path ='.', resolution_prio=False, queue_size=16, on_backpressure='block', encoder='x264', crf=None, threads=None,
+                             name_template='prev_vid_{serial}_{timestamp}_{seq:03d}'):
         '''
         Capture a series of previews (i.e. the viewfinder frames, with mirror up)
         for a duration of t seconds, pipe them directly to the PC save them as a video file on the PC.
         The file will not be saved to the camera's storage device.
-        Note that this function will overwrite existing files in the specified location!
+        Capture and encoding are decoupled: this thread only captures frames and puts them into a bounded queue,
+        a writer thread feeds them to ffmpeg without copying (see workers.PipeWriter), which encodes while the recording runs.
+        If ffmpeg falls behind, on_backpressure='block' waits for it (no frames lost, lower fps), 'drop' discards new frames instead (steady capture).
+        The host timestamp of every frame, the achieved and the nominal fps are stored in self.last_preview_recording.
+        The capture times are written next to the video: <video>.timestamps.txt (timecode format v2 in ms) and <video>.frames.csv (frame log for syncing with other sensors).
+        The preview rate varies (~15-60 fps), so the video gets variable frame rate: ffmpeg records into a temporary .mkv at the nominal rate,
+        afterwards mkvmerge replaces its timestamps with the capture times from the timecode file (a remux, no re-encoding).
+        Without mkvmerge installed the video keeps the nominal frame rate, the timecode file can still be applied later.
+        The encoder is chosen from ENCODER_PROFILES: 'x264' (default), 'x264_fast' (ultrafast/zerolatency preset, for recording several cameras on one host)
+        or 'passthrough', which copies the camera's MJPEG frames into an .mkv container without re-encoding, so that recording costs almost no CPU.
+        crf and threads are passed on to the encoder (ignored for passthrough).
+        The output file name is built from name_template with the fields {serial}, {port}, {timestamp} and {seq} (running number).
+        The name is reserved atomically before recording and never overwrites an existing file, ffmpeg writes to a hidden temporary file
+        that is only renamed to the final name once the recording is complete. This way several cameras (or processes) can record into the same directory at once.
         Only supported in PHOTO mode.
-        Inputs: t=duration in seconds (int or float), target_file=string with file path, resolution_prio=boolean
+        Inputs: t=duration in seconds (int or float), target_file=string with file path, resolution_prio=boolean, queue_size=int, on_backpressure='block' or 'drop',
+                encoder=string (key of ENCODER_PROFILES), crf=int or None, threads=int or None, name_template=string
         '''
+        self.ensure_setup()
         if self.mode == 1:
             error_msg = "Camera must be in PHOTO mode to capture preview videos"
             print(error_msg)
             return False, None, error_msg
         
-        target_file = target_path + '/prev_vid.mp4'
-        if os.path.exists(target_file): # always overwrite existing file to prevent ffmpeg error
-            os.remove(target_file)
-
-        # if a higher resolution is the priority, record in 'eosmoviemode' at 1024x576 and ~25 fps
-        # if a higher frame rate is the priority, record at 960x640 and close to ~60 fps
-        if resolution_prio:
-            self.set_config_and_confirm(['eosmoviemode'], [1])
-        else:
-            self.set_config_and_confirm(['liveviewsize'], ['Large']) # set to max size: 960x640
-
-        # Attempting to recreate the bash command "gphoto2 --capture-movie"
-        # under the hood, this just takes repeated preview captures
-        # see https://github.com/gphoto/gphoto2/blob/f632dcccfc2f27b7e510941335a80dfc986b4bf2/gphoto2/actions.c#L1053
-        # sp.call(['gphoto2 --capture-movie=2s'], shell=True) # Can't call the bash command here, because I/O is busy
-        #OK, path = gp.gp_camera_capture(self.camera, gp.GP_CAPTURE_MOVIE) # error: function not supported
-        ffmpeg_command = [
-            'ffmpeg', 
-            '-f', 'image2pipe',           # Input format
-            '-vcodec', 'mjpeg',
-            '-i', '-',                    # Input comes from a pipe
-            '-c:v', 'libx264',            # Video codec to use for encoding
-            '-pix_fmt', 'yuvj422p',        # Output pixel format
-            target_file                   # Output file path
-        ]
-
-        ffmpeg = Popen(ffmpeg_command, stdin=PIPE)
-
-        start_time = time.time()  # Start the timer
-        while True:
-            if time.time() - start_time > t:
-                break  # Stop recording after t seconds
-            capture = self.camera.capture_preview()
-            filedata = capture.get_data_and_size()
-            data = memoryview(filedata)
-            ffmpeg.stdin.write(data.tobytes())
-        ffmpeg.stdin.close()
-        ffmpeg.wait()
-
-        if resolution_prio:
-            self.set_config_and_confirm(['eosmoviemode'], [0])
-        return True, target_file, 'saved to computer'
+        if encoder not in ENCODER_PROFILES:
+            error_msg = f"Encoder {encoder} not supported, please choose one of {list(ENCODER_PROFILES)}"
+            print(error_msg)
+            return False, None, error_msg
+        profile = ENCODER_PROFILES[encoder]
+        output_args = list(profile['args'])
+        if profile['encode']:
+            if crf is not None:
+                output_args += ['-crf', str(crf)]
+            if threads is not None:
+                output_args += ['-threads', str(threads)]
+
+        # Everything from here on is undone in the finally block if anything fails (or the user interrupts the recording):
+        # the preview generator and writer thread are stopped, ffmpeg is terminated, temporary files and the reserved name are removed,
+        # and the movie mode is restored.
+        movie_mode = False
+        target_file, tmp_file, live_file, timed_file = None, None, None, None
+        timecode_file, frame_log = None, None
+        frames, writer, ffmpeg = None, None, None
+        writer_closed = False
+        done = False
+        try:
+            # if a higher resolution is the priority, record in 'eosmoviemode' at 1024x576 and ~25 fps
+            # if a higher frame rate is the priority, record at 960x640 and close to ~60 fps
+            if resolution_prio:
+                movie_mode = True
+                self.set_config_and_confirm(['eosmoviemode'], [1])
+                nominal_fps = 25
+            else:
+                self.set_config_and_confirm(['liveviewsize'], ['Large']) # set to max size: 960x640
+                nominal_fps = 60
+
+            # Attempting to recreate the bash command "gphoto2 --capture-movie"
+            # under the hood, this just takes repeated preview captures
+            # see https://github.com/gphoto/gphoto2/blob/f632dcccfc2f27b7e510941335a80dfc986b4bf2/gphoto2/actions.c#L1053
+            # sp.call(['gphoto2 --capture-movie=2s'], shell=True) # Can't call the bash command here, because I/O is busy
+            #OK, path = gp.gp_camera_capture(self.camera, gp.GP_CAPTURE_MOVIE) # error: function not supported
+            fields = {'serial': self.get_serial_number(), 'port': self.port, 'timestamp': time.strftime('%Y%m%d-%H%M%S')}
+            target_file, self.recording_seq = reserve_output_file(target_path, name_template, fields, profile['extension'], self.recording_seq)
+            tmp_file = os.path.join(target_path, '.' + os.path.basename(target_file) + '.tmp' + profile['extension']) # keep the extension, ffmpeg picks the container from it
+
+            live_file = os.path.join(target_path, '.' + os.path.basename(target_file) + '.live.mkv') # ffmpeg's output during the recording
+            timed_file = tmp_file if profile['extension'] == '.mkv' else os.path.join(target_path, '.' + os.path.basename(target_file) + '.timed.mkv')
+            ffmpeg_command = [
+                'ffmpeg',
+                '-f', 'image2pipe',           # Input format
+                '-vcodec', 'mjpeg',
+                '-framerate', str(nominal_fps), # placeholder timestamps, replaced by the capture times afterwards
+                '-i', '-',                    # Input comes from a pipe
+                '-vsync', 'passthrough',      # one output frame per input frame, never duplicate or drop
+                *output_args,                 # Video codec and options, see ENCODER_PROFILES
+                '-y', live_file               # Output file path (temporary, retimed when complete)
+            ]
+            ffmpeg = Popen(ffmpeg_command, stdin=PIPE)
+            writer = PipeWriter(ffmpeg.stdin, max_queue=queue_size, policy=on_backpressure)
+
+            # every queued frame is still referenced by its pooled CameraFile, so the pool must be larger than the queue
+            frames = self.preview_frames(pool_size=queue_size + 3)
+            frame_times = [] # host timestamps (time.time) of the frames passed on to ffmpeg
+            frame_clock = [] # the same timestamps from time.perf_counter, for precise intervals
+            start_time = time.monotonic()  # Start the timer
+            for frame in frames:
+                timestamp, clock = time.time(), time.perf_counter()
+                if time.monotonic() - start_time > t:
+                    break  # Stop recording after t seconds
+                if writer.put(frame):
+                    frame_times.append(timestamp)
+                    frame_clock.append(clock)
+            frames.close()
+            written, dropped = writer.close()
+            writer_closed = True
+            returncode = ffmpeg.wait()
+
+            if writer.error is not None or returncode != 0 or not frame_clock:
+                msg = f'Recording failed: {writer.error or (f"ffmpeg exit code {returncode}" if returncode != 0 else "no frames captured")}'
+                print(msg)
+                return False, None, msg
+
+            timecode_file, frame_log = write_frame_times(os.path.splitext(target_file)[0], frame_times, frame_clock)
+            if not self._apply_timecodes(live_file, timecode_file, timed_file):
+                os.replace(live_file, timed_file) # keep the nominal frame rate
+            if timed_file != tmp_file:
+                # move the frames into the profile's container, copying the stream with its timestamps
+                returncode = sp.call(['ffmpeg', '-loglevel', 'error', '-i', timed_file, '-c', 'copy', '-y', tmp_file])
+                if returncode != 0:
+                    msg = f'Recording failed: ffmpeg exit code {returncode} while remuxing'
+                    print(msg)
+                    return False, None, msg
+            os.replace(tmp_file, target_file) # atomically replaces the reserved (empty) placeholder
+            done = True
+        except CameraError as err:
+            print(err)
+            return False, None, str(err)
+        finally:
+            if frames is not None:
+                frames.close()
+            if writer is not None and not writer_closed:
+                writer.close()
+            if ffmpeg is not None and ffmpeg.poll() is None:
+                ffmpeg.terminate()
+                ffmpeg.wait()
+            # the intermediate videos, and if the recording failed also the temporary output, the reserved name and the frame logs
+            for path in [live_file, timed_file] + ([] if done else [tmp_file, target_file, timecode_file, frame_log]):
+                if path is not None and os.path.exists(path):
+                    os.remove(path)
+            if movie_mode:
+                try:
+                    self.set_config_and_confirm(['eosmoviemode'], [0])
+                except CameraError as err:
+                    print(err)
+
+        achieved_fps = (len(frame_clock) - 1) / (frame_clock[-1] - frame_clock[0]) if len(frame_clock) > 1 else 0
+        self.last_preview_recording = {'file': target_file, 'frame_times': frame_times, 'dropped': dropped, 'fps': achieved_fps, 'nominal_fps': nominal_fps,
+                                       'timecode_file': timecode_file, 'frame_log': frame_log}
+        msg = f'saved to computer, {len(frame_times)} frames at {achieved_fps:.1f} fps (nominal {nominal_fps} fps), {dropped} dropped'
+        return True, target_file, msg
     
-    def capture_burst(self, t=0.5, save_timeout=5):
+    @staticmethod
+    def _apply_timecodes(video_file, timecode_file, output_file):
+        '''
+        Replace the timestamps of the first track of a Matroska video with the ones in a timecode format v2 file (see write_frame_times()), using mkvmerge.
+        Output: bool, False if mkvmerge is not installed or failed (the video is left as it is)
+        '''
+        try:
+            returncode = sp.call(['mkvmerge', '--quiet', '-o', output_file, '--timestamps', f'0:{timecode_file}', video_file])
+        except FileNotFoundError:
+            print(f"mkvmerge not found, the video keeps its nominal frame rate. The capture times are in {timecode_file}")
+            return False
+        if returncode not in (0, 1): # 1 == warnings only
+            print(f"mkvmerge failed (exit code {returncode}), the video keeps its nominal frame rate. The capture times are in {timecode_file}")
+            return False
+        return True
+
+    def capture_burst(self, t=0.5, save_timeout=5, download=False, target_path='.', queue_size=8, writers=1):
         '''
         Shoot a quick burst of full-scale images for a duration of t seconds.
         Should achieve about 8-9fps. 
-        The image files are saved to the camera storage device first and must be donwloaded separately.
-        Returns a list of file locations on the camera.
+        The image files are saved to the camera storage device first.
+        With download=False they must be downloaded separately and a list of file locations on the camera is returned.
+        With download=True the files are streamed to target_path as soon as the camera announces them:
+        USB transfers run on this thread while a pool of writer threads saves the received files to disk in parallel (see workers.FileWriter).
+        Transfers start during the burst already, as long as the previous transfer time fits into the remaining trigger hold.
+        The trigger is released with millisecond accuracy (see timing.wait_until()), the achieved hold duration is stored in self.last_hold_duration.
         Only supported in PHOTO mode.
-        Input: t=duration in seconds (int or float)
-        Outputs: success=boolean, files=list of strings, msg=string
+        Input: t=duration in seconds (int or float), download=bool, target_path=string, queue_size=max number of files buffered in memory, writers=number of writer threads
+        Outputs: success=boolean, files=list of strings (camera paths, or local paths if downloaded), msg=string
         '''
+        self.ensure_setup()
         if self.mode == 1:
             error_msg = "Camera must be in PHOTO mode to capture burst"
             print(error_msg)
             return False, None, error_msg
 
         # Set the drive mode to continuous shooting
-        self.set_config_and_confirm(['drivemode'], ['Super high speed continuous shooting'])
-
-        # start shooting but activating remote trigger
-        start = time.time()
-        self.set_config_fire_and_forget('eosremoterelease', 'Immediate')
-        while time.time() - start < t:
-            pass # wait for the desired duration
-        # and turn the trigger OFF again
-        self.set_config_fire_and_forget('eosremoterelease', 'Release Full')
-
-        # after the burst is over, fetch all the files
-        # this allows for faster shooting rather than saving files after each capture
-        files=[]
-        timeout = time.time() + save_timeout # the save timeout stops retrieving of files if no new file has been written for a while
-        while True:
-            event_type, event_data = self.camera.wait_for_event(100)
-            if event_type == gp.GP_EVENT_FILE_ADDED:
-                files.append(event_data.folder +'/'+ event_data.name)
-                timeout = time.time() + save_timeout
-            elif time.time() > timeout:
-                break
+        try:
+            self.set_config_and_confirm(['drivemode'], ['Super high speed continuous shooting'])
+        except CameraError as err:
+            print(err)
+            return False, None, str(err)
+
+        files = [] # camera paths in order of announcement
+        pending = [] # announced by the camera but not downloaded yet
+        targets = []
+        transfer_errors = [] # (camera path, error) of files that stay on the camera
+        writer = FileWriter(max_queue=queue_size, threads=writers) if download else None
+
+        def fetch(camera_path, busy_retries):
+            # transfer one file via USB and hand it to the writer threads, a failed transfer is recorded and the file stays on the camera
+            folder, name = os.path.split(camera_path)
+            transfer_start = time.monotonic()
+            try:
+                cam_file = self._retry_if_busy(lambda: self.camera.file_get(folder, name, gp.GP_FILE_TYPE_NORMAL), f"downloading {camera_path}", busy_retries)
+            except CameraError as err:
+                return err
+            self.last_transfer_time = time.monotonic() - transfer_start
+            target_file = os.path.join(target_path, name)
+            writer.put(cam_file, target_file)
+            targets.append(target_file)
+            return None
 
-        # Finally, set the drive mode back to individual captures
-        self.set_config_and_confirm(['drivemode'], ['Single'])
-        return True, files, 'saved to camera'
+        # the event pump hands every new file of this burst to us, even while we are busy transferring another one
+        announced = queue.Queue()
+        subscription = self.events.subscribe(FILE_ADDED, announced.put)
+
+        def collect(timeout):
+            # wait up to timeout seconds for the next announced file
+            try:
+                event = announced.get(timeout=max(timeout, 0))
+            except queue.Empty:
+                return False
+            files.append(event.data.folder +'/'+ event.data.name)
+            pending.append(files[-1])
+            return True
+
+        released = False
+        write_errors = []
+        try:
+            # start shooting but activating remote trigger
+            transfer_during_hold = download
+            self.set_config_fire_and_forget('eosremoterelease', 'Immediate')
+            start = time.perf_counter() # the hold starts once the trigger write has been accepted
+            deadline = start + t
+            while True: # wait for the desired duration, collecting new files in the meantime
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0.002 + self.events.poll_ms / 1000: # wait for the exact moment to release
+                    break
+                if transfer_during_hold and pending and self.last_transfer_time is not None and self.last_transfer_time < remaining:
+                    camera_path = pending.pop(0)
+                    if fetch(camera_path, busy_retries=0) is not None:
+                        pending.insert(0, camera_path) # the camera is too busy while shooting, fetch it after the burst
+                        transfer_during_hold = False
+                    continue
+                collect(remaining - 0.002)
+            # and turn the trigger OFF again, holding the camera lock so that the event pump cannot delay the release write
+            with self.camera.lock:
+                wait_until(deadline)
+                self.set_config_fire_and_forget('eosremoterelease', 'Release Full')
+                released = True
+            self.last_hold_duration = time.perf_counter() - start # until the release write has been accepted, not just until the host stopped waiting
+
+            # after the burst is over, fetch all remaining files
+            timeout = time.time() + save_timeout # the save timeout stops retrieving of files if no new file has been written for a while
+            while True:
+                if download and pending:
+                    camera_path = pending.pop(0)
+                    err = fetch(camera_path, busy_retries=5)
+                    if err is not None:
+                        print(err)
+                        transfer_errors.append((camera_path, err))
+                    timeout = time.time() + save_timeout
+                    continue
+                if collect(0.1):
+                    timeout = time.time() + save_timeout
+                elif time.time() > timeout:
+                    break
+        finally:
+            # whatever happened, never leave the camera shooting or in continuous drive mode
+            if not released:
+                try:
+                    self.set_config_fire_and_forget('eosremoterelease', 'Release Full')
+                except CameraError as err:
+                    print(err)
+            self.events.unsubscribe(FILE_ADDED, subscription)
+            # Finally, set the drive mode back to individual captures
+            try:
+                self.set_config_and_confirm(['drivemode'], ['Single'])
+            except CameraError as err:
+                print(err)
+            if download:
+                written, write_errors = writer.close()
+
+        if download:
+            if transfer_errors or write_errors:
+                error_msg = f"{len(transfer_errors)} of {len(files)} files could not be downloaded, {len(write_errors)} could not be written"
+                print(error_msg)
+                return False, targets, error_msg
+            return True, targets, f'downloaded (trigger held for {self.last_hold_duration:.3f} s)'
+        return True, files, f'saved to camera (trigger held for {self.last_hold_duration:.3f} s)'
+
+
+    def _capture_entry(self, entry, start, timeout):
+        '''
+        Take one image of a capture series (capture_sweep(), capture_focus_stack()) with capture_immediate() and record it in its manifest entry.
+        Output: bool, True if the image was taken, otherwise the error is stored in the entry
+        '''
+        try:
+            success, file_path, msg = self.capture_immediate(download=False, timeout=timeout)
+        except CameraError as err:
+            success, msg = False, str(err)
+            print(f"Image {entry['index']}: {err}")
+        if not success:
+            entry['error'] = msg
+            return False
+        entry['camera_path'] = self.last_camera_path
+        entry['timestamp'] = self.last_capture_time - start
+        return True
+
+    def _fetch_entry(self, entry, writer, target_path):
+        '''Transfer the image of a manifest entry via USB and hand it to the writer threads (see workers.FileWriter), errors are stored in the entry.'''
+        folder, name = os.path.split(entry['camera_path'])
+        transfer_start = time.monotonic()
+        try:
+            cam_file = self.camera.file_get(folder, name, gp.GP_FILE_TYPE_NORMAL)
+        except Exception as err:
+            entry['error'] = f"Download failed: {err}"
+            print(entry['error'])
+            return
+        self.last_transfer_time = time.monotonic() - transfer_start
+        entry['file'] = os.path.join(target_path, name)
+        writer.put(cam_file, entry['file'])
+
+    def _finish_manifest(self, manifest, pending, writer, target_path, manifest_name, start, unit, interrupted=False):
+        '''
+        Finish a capture series: transfer the last image, wait for the writer threads, note write errors in the manifest and save it as JSON.
+        The writer threads are stopped and the manifest is saved even if the last transfer fails.
+        With interrupted=True (the series was aborted by an error) the last image is not transferred but left on the camera, and noted as such.
+        Without a writer (download=False) nothing is transferred or saved.
+        Output: success=bool, manifest, msg=string
+        '''
+        if interrupted and manifest and manifest[-1]['camera_path'] is None and manifest[-1]['error'] is None:
+            manifest[-1]['error'] = "Interrupted before the capture"
+        if writer is not None:
+            try:
+                if pending is not None:
+                    if interrupted:
+                        pending['error'] = "Not downloaded, the series was interrupted"
+                    else:
+                        self.wait_until_ready()
+                        self._fetch_entry(pending, writer, target_path)
+            finally:
+                written, errors = writer.close()
+                for target_file, err in errors:
+                    for entry in manifest:
+                        if entry['file'] == target_file:
+                            entry['error'] = f"Could not write file: {err}"
+                save_manifest(manifest, os.path.join(target_path, manifest_name))
+
+        failed = sum(entry['error'] is not None for entry in manifest)
+        msg = f"{len(manifest) - failed} of {len(manifest)} {unit} captured in {time.perf_counter() - start:.1f} s"
+        if failed:
+            print(msg)
+        return failed == 0, manifest, msg
+
+    def capture_sweep(self, aperture=None, iso=None, shutterspeed=None, download=True, target_path='.', manifest_name='sweep_manifest.json',
+                      queue_size=8, writers=1, timeout=5):
+        '''
+        Capture one image for every combination of the given aperture, ISO and shutter speed values, e.g. for HDR brackets or calibration grids.
+        Each input is a list of values (see set_capture_parameters() for the accepted formats), or None to leave that setting unchanged.
+        The values are checked once up front, and the shots are ordered so that only one setting changes between consecutive shots (see plan_sweep()).
+        While the camera applies the settings of the next shot, the previous image is transferred via USB and handed to writer threads (see workers.FileWriter).
+        With download=True a manifest of all shots is also saved as JSON in target_path.
+        Only supported in PHOTO mode.
+        Output: success=bool, manifest=list of dicts (shot index, requested and confirmed settings, camera path, local path, seconds since the start, error), msg=string
+        '''
+        self.ensure_setup()
+        if self.mode == 1:
+            error_msg = "Camera must be in PHOTO mode to capture static images"
+            print(error_msg)
+            return False, [], error_msg
+
+        # check and format all values once, duplicates (e.g. two inputs mapped to the same closest option) are only shot once
+        axes = []
+        for config_name, inputs, pick in [('aperture', aperture, self.pick_aperture_value), ('iso', iso, self.pick_iso_value),
+                                           ('shutterspeed', shutterspeed, self.pick_shutterspeed_value)]:
+            if inputs is None:
+                continue
+            if not isinstance(inputs, (list, tuple)):
+                inputs = [inputs]
+            values = []
+            for value in inputs:
+                value = pick(value)[0]
+                if value is not None and value not in values:
+                    values.append(value)
+            if values:
+                axes.append((config_name, values))
+        plan = plan_sweep(axes)
+
+        manifest = []
+        pending = None # the previous shot, transferred while the camera applies the next settings
+        writer = FileWriter(max_queue=queue_size, threads=writers) if download else None
+
+        start = time.perf_counter()
+        try:
+            for index, settings in enumerate(plan):
+                entry = {'index': index, 'requested': settings, 'settings': None, 'camera_path': None, 'file': None, 'timestamp': None, 'error': None}
+                manifest.append(entry)
+                try:
+                    changes = self.push_config_changes(list(settings.keys()), list(settings.values()))
+                    if download and pending is not None:
+                        self._fetch_entry(pending, writer, target_path)
+                        pending = None
+                    if changes is None:
+                        raise CameraError(f"Could not set {settings}")
+                    if changes:
+                        self.confirm_config([config_name for config_name, value in changes], [value for config_name, value in changes])
+                    else:
+                        self.wait_until_ready() # nothing to change, but the camera may still be saving the previous shot
+                except CameraError as err:
+                    entry['error'] = str(err)
+                    print(f"Shot {index} skipped: {err}")
+                    continue
+
+                # the values the camera confirmed, as kept in the cache by confirm_config()
+                entry['settings'] = {config_name: self._config_index[config_name].get_value() for config_name in ['aperture', 'iso', 'shutterspeed'] if config_name in self._config_index}
+                if not self._capture_entry(entry, start, timeout):
+                    continue
+                pending = entry
+        except BaseException:
+            # e.g. a gphoto2 error or Ctrl-C: stop the writer threads and keep a manifest of what was captured so far
+            self._finish_manifest(manifest, pending, writer, target_path, manifest_name, start, 'shots', interrupted=True)
+            raise
+
+        return self._finish_manifest(manifest, pending, writer, target_path, manifest_name, start, 'shots')
+
+    def capture_bracket(self, stops=(-2, 0, 2), aperture=None, iso=None, download=True, target_path='.', **kwargs):
+        '''
+        Exposure bracketing: capture one image per exposure offset (in stops) around the current shutter speed, see capture_sweep().
+        The shutter speed must be set manually (not AUTO), each offset is mapped to the closest supported shutter speed.
+        Input: stops=list of exposure offsets (EV), aperture, iso=optional single values or lists, further keyword arguments are passed on to capture_sweep()
+        Output: see capture_sweep()
+        '''
+        self.ensure_setup()
+        base = parse_numeric(self.get_shutterspeed())
+        if base is None:
+            error_msg = "Set a manual shutter speed before bracketing, the current setting is AUTO"
+            print(error_msg)
+            return False, [], error_msg
+        shutterspeeds = [self.shutter_table.closest(base * 2 ** stop) for stop in stops]
+        return self.capture_sweep(aperture=aperture, iso=iso, shutterspeed=shutterspeeds, download=download, target_path=target_path, **kwargs)
+
+
+    def capture_focus_stack(self, slices=10, step=4, steps_per_slice=1, download=True, target_path='.', manifest_name='focus_stack_manifest.json',
+                            tolerance=0.05, settle_timeout=2, roi=None, queue_size=8, writers=1, timeout=5):
+        '''
+        Focus stacking: capture one image at each of a series of focus positions, starting from the current focus.
+        Between slices the lens is driven by steps_per_slice increments of the manual_focus() value step (e.g. 4 == small increments farther).
+        Instead of sleeping after each drive, the preview sharpness is watched until the lens has settled (see wait_for_focus_settled()).
+        While the lens moves, the previous image is transferred via USB and handed to writer threads (see workers.FileWriter).
+        With download=True a manifest of all slices is also saved as JSON in target_path.
+        Needs manual focus (switch on the lens set to MF). Only supported in PHOTO mode.
+        Output: success=bool, manifest=list of dicts (slice index, preview sharpness, settle time, camera path, local path, error), msg=string
+        '''
+        self.ensure_setup()
+        if self.mode == 1:
+            error_msg = "Camera must be in PHOTO mode to capture static images"
+            print(error_msg)
+            return False, [], error_msg
+
+        manifest = []
+        pending = None # the previous slice, transferred while the lens moves to the next position
+        writer = FileWriter(max_queue=queue_size, threads=writers) if download else None
+        frames = self.preview_frames(pool_size=2)
+
+        start = time.perf_counter()
+        try:
+            sharpness = preview_sharpness(next(frames), roi)
+            for index in range(slices):
+                entry = {'index': index, 'sharpness': None, 'settle_time': 0.0, 'camera_path': None, 'file': None, 'timestamp': None, 'error': None}
+                manifest.append(entry)
+                try:
+                    if index > 0:
+                        for _ in range(steps_per_slice):
+                            self.manual_focus(step)
+                    if download and pending is not None:
+                        self._fetch_entry(pending, writer, target_path)
+                        pending = None
+                    if index > 0:
+                        sharpness, entry['settle_time'], settled = self.wait_for_focus_settled(frames, sharpness, tolerance, settle_timeout, roi)
+                        if not settled:
+                            print(f"Slice {index}: focus did not settle within {settle_timeout} s")
+                    entry['sharpness'] = sharpness
+                except CameraError as err:
+                    entry['error'] = str(err)
+                    print(f"Slice {index} skipped: {err}")
+                    continue
+
+                if not self._capture_entry(entry, start, timeout):
+                    continue
+                pending = entry
+        except BaseException:
+            # e.g. a gphoto2 error from the preview, a decode error or Ctrl-C: stop the writer threads and keep a manifest of what was captured so far
+            self._finish_manifest(manifest, pending, writer, target_path, manifest_name, start, 'slices', interrupted=True)
+            raise
+        finally:
+            frames.close()
+
+        return self._finish_manifest(manifest, pending, writer, target_path, manifest_name, start, 'slices')
 
 
     ''' VIDEO mode only methods'''
 
-    def record_video(self, t=1, download=True, target_path='.', save_timeout=5):
+    def record_video(self, t=1, download=True, target_path='.', save_timeout=5, progress=None):
         '''
         Record a video for a duration of t seconds.
         Resolution and file formats are set in the camera's menu. Storage medium must be inserted.
         Only supported in VIDEO mode.
-        The video is written to the camera's storage device first and downloaded to the PC afterwards.
-        Inputs: t=duration in seconds (int or float), download=boolean, target_path=string
+        The video is written to the camera's storage device first and downloaded to the PC afterwards, streamed in chunks so that large files don't need to fit into memory.
+        The actually achieved recording duration (host side) is stored in self.last_hold_duration.
+        Inputs: t=duration in seconds (int or float), download=boolean, target_path=string, progress=optional callable(bytes_done, bytes_total, seconds_elapsed)
         Output: success=boolean, file_path=string, msg=string
         '''
         if self.mode == 0:
@@ -919,26 +2264,33 @@ class EOS(object):
             return False, None, error_msg
         
         # recording
-        start = time.time()
-        self.set_config_fire_and_forget('movierecordtarget', 'Card')
-        while time.time() - start < t:
-            pass
-        self.set_config_fire_and_forget('movierecordtarget', 'None')
+        new_file = self.events.expect(FILE_ADDED) if download else None
+        recorded = False
+        try:
+            self.set_config_fire_and_forget('movierecordtarget', 'Card')
+            start = time.perf_counter() # the recording starts once the write has been accepted
+            try:
+                wait_until(start + t) # sleeps instead of spinning a full core for the whole recording
+            finally:
+                self.set_config_fire_and_forget('movierecordtarget', 'None') # stop recording, even if interrupted
+            self.last_hold_duration = time.perf_counter() - start
+            recorded = True
+        except CameraError as err:
+            print(err)
+            return False, None, str(err)
+        finally:
+            if not recorded and new_file is not None:
+                self.events.cancel(FILE_ADDED, new_file) # otherwise it would take the file event of the next recording
 
         # fetching the file
-        timeout = time.time() + save_timeout
         if download:
-            while True:
-                # potential for errors if the new file event is not caught by this wait loop
-                event_type, event_data = self.camera.wait_for_event(1000)
-                if event_type == gp.GP_EVENT_FILE_ADDED:
-                    cam_file = self.camera.file_get(event_data.folder, event_data.name, gp.GP_FILE_TYPE_NORMAL)
-                    cam_file.save(target_path+'/'+event_data.name)
-                    return True, target_path+'/'+event_data.name, 'File downloaded to PC'
-                elif time.time() > timeout:
-                    error_msg = "Warning: Waiting for new file event timed out, capture may have failed."
-                    print(error_msg)
-                    return True, None, error_msg
+            event = self.wait_for_event(FILE_ADDED, new_file, timeout=save_timeout)
+            if event is None:
+                error_msg = "Warning: Waiting for new file event timed out, capture may have failed."
+                print(error_msg)
+                return True, None, error_msg
+            stats = self.stream_file(event.data.folder, event.data.name, target_path+'/'+event.data.name, progress=progress)
+            return True, target_path+'/'+event.data.name, f"File downloaded to PC ({stats['MB/s']:.1f} MB/s)" if stats['MB/s'] else 'File downloaded to PC'
         return True, None, 'saved to camera'
 
 if __name__ == '__main__':
@@ -0,0 +1,180 @@
+import gphoto2 as gp
+import threading, time, collections
+from concurrent.futures import Future
+
+# event kinds routed by the EventDispatcher
+FILE_ADDED = 'file_added'
+CONFIG_CHANGED = 'config_changed'
+CAPTURE_COMPLETE = 'capture_complete'
+TIMEOUT = 'timeout'
+
+# A camera event: its kind, the gphoto2 event data, and the host time (time.perf_counter) at which it was received
+Event = collections.namedtuple('Event', ['kind', 'data', 'timestamp'])
+
+class LockedCamera(object):
+    """
+    Wrap a gphoto2 Camera so that every method call holds the camera's lock.
+    libgphoto2 must not be used from two threads at the same time, but with the event pump running in the background
+    every camera call has to be serialised with the pump's wait_for_event calls.
+    """
+
+    def __init__(self, camera):
+        self._camera = camera
+        self.lock = threading.RLock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._camera, name)
+        if not callable(attr):
+            return attr
+        def locked(*args, **kwargs):
+            with self.lock:
+                return attr(*args, **kwargs)
+        return locked
+
+
+class EventDispatcher(object):
+    """
+    Drain a camera's events continuously on a background thread and route them to subscribers.
+
+    Instead of running their own wait_for_event loops (and discarding any event they don't expect), capture methods
+    register for the next event of a kind with expect() before triggering and then wait on the returned Future.
+    New files that nobody was waiting for are kept in self.unclaimed_files, so no file announcement is lost.
+    """
+
+    def __init__(self, camera, poll_ms=10, unclaimed_size=1000):
+        self.camera = camera
+        self.poll_ms = poll_ms
+        self.unclaimed_files = collections.deque(maxlen=unclaimed_size)
+        self.counts = collections.Counter() # number of events received per kind
+        self._subscribers = collections.defaultdict(list)
+        self._expected = collections.defaultdict(list)
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        '''Start the event pump thread.'''
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='EOS events', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        '''Stop the event pump thread, pending expectations are cancelled.'''
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._condition:
+            for futures in self._expected.values():
+                for future, predicate in futures:
+                    future.cancel()
+            self._expected.clear()
+            self._condition.notify_all()
+        return
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self, kind, callback):
+        '''
+        Call callback(Event) for every event of the given kind, on the event pump thread.
+        Callbacks should return quickly, the pump is stalled while they run.
+        '''
+        with self._condition:
+            self._subscribers[kind].append(callback)
+        return callback
+
+    def unsubscribe(self, kind, callback):
+        with self._condition:
+            if callback in self._subscribers[kind]:
+                self._subscribers[kind].remove(callback)
+        return
+
+    def expect(self, kind, predicate=None):
+        '''
+        Register for the next event of the given kind (optionally matching predicate(Event)).
+        Call this BEFORE triggering the action that causes the event, so that it cannot be missed.
+        Output: concurrent.futures.Future that resolves to the Event
+        '''
+        future = Future()
+        with self._condition:
+            self._expected[kind].append((future, predicate))
+        return future
+
+    def cancel(self, kind, future):
+        '''Withdraw an expectation registered with expect(), e.g. after a timeout.'''
+        with self._condition:
+            self._expected[kind] = [entry for entry in self._expected[kind] if entry[0] is not future]
+        future.cancel()
+        return
+
+    def wait_for(self, kind, timeout, after=None):
+        '''
+        Block until an event of the given kind arrives, or until timeout seconds have passed.
+        If after is given (a value of self.counts[kind] read earlier), events that arrived since then count as well.
+        Output: bool, True if such an event was received
+        '''
+        with self._condition:
+            if after is None:
+                after = self.counts[kind]
+            return self._condition.wait_for(lambda: self.counts[kind] > after or not self.running, timeout) and self.counts[kind] > after
+
+    def flush(self, timeout=1):
+        '''Wait until the camera's event queue has been emptied once, i.e. all events that happened so far were dispatched.'''
+        return self.wait_for(TIMEOUT, timeout)
+
+    def pop_unclaimed_files(self):
+        '''
+        Get (and forget) all new-file events that no capture method was waiting for.
+        Output: list of Events
+        '''
+        with self._condition:
+            files = list(self.unclaimed_files)
+            self.unclaimed_files.clear()
+        return files
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                event_type, event_data = self.camera.wait_for_event(self.poll_ms)
+            except Exception as err:
+                print(f"Camera event pump error: {err}")
+                time.sleep(self.poll_ms / 1000)
+                continue
+            timestamp = time.perf_counter()
+            if event_type == gp.GP_EVENT_FILE_ADDED:
+                self.dispatch(Event(FILE_ADDED, event_data, timestamp))
+            elif event_type == gp.GP_EVENT_CAPTURE_COMPLETE:
+                self.dispatch(Event(CAPTURE_COMPLETE, event_data, timestamp))
+            elif event_type == gp.GP_EVENT_UNKNOWN and 'PTP Property' in str(event_data):
+                # Canon bodies announce changed properties (e.g. from turning a dial) as 'PTP Property ... changed'
+                self.dispatch(Event(CONFIG_CHANGED, event_data, timestamp))
+            elif event_type == gp.GP_EVENT_TIMEOUT:
+                self.dispatch(Event(TIMEOUT, None, timestamp))
+                time.sleep(0.001) # let other threads take the camera lock between polls
+
+    def dispatch(self, event):
+        '''Route an event to the waiting futures and subscribers.'''
+        with self._condition:
+            self.counts[event.kind] += 1
+            claimed = False
+            remaining = []
+            for future, predicate in self._expected[event.kind]:
+                if not claimed and (predicate is None or predicate(event)):
+                    future.set_result(event)
+                    claimed = True
+                else:
+                    remaining.append((future, predicate))
+            self._expected[event.kind] = remaining
+            subscribers = list(self._subscribers[event.kind])
+            if event.kind == FILE_ADDED and not claimed and not subscribers:
+                self.unclaimed_files.append(event)
+            self._condition.notify_all()
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as err:
+                print(f"Event subscriber failed: {err}")
+        return
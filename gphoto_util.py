@@ -1,5 +1,52 @@
 import gphoto2 as gp
 import subprocess as sp
+import threading
+
+# Port and abilities lists are the same for every camera, so they are loaded only once per process and shared (see get_port_info() and get_abilities())
+_registry = {}
+_registry_lock = threading.Lock()
+
+def free_usb_ports(force=False):
+    """
+    Kill any existing gphoto processes to free up the USB ports for communication,
+    prevents error *Could not claim the USB device*. Only runs once per process unless force=True.
+    """
+    with _registry_lock:
+        if _registry.get('ports_freed') and not force:
+            return
+        command = f'killall gvfsd-gphoto2 gvfs-gphoto2-volume-monitor'
+        sp.call([command], shell=True)
+        _registry['ports_freed'] = True
+
+def autodetect(refresh=False):
+    """
+    List all connected cameras as (model name, port) tuples.
+    The result is cached, use refresh=True after connecting or disconnecting cameras.
+    """
+    with _registry_lock:
+        if refresh or 'camera_list' not in _registry:
+            _registry['camera_list'] = list(gp.Camera.autodetect())
+        return list(_registry['camera_list'])
+
+def get_port_info(port):
+    """Look up the gphoto2 PortInfo for a port address, from a port list that is loaded only once."""
+    with _registry_lock:
+        if 'port_info_list' not in _registry:
+            port_info_list = gp.PortInfoList()
+            port_info_list.load()
+            _registry['port_info_list'] = port_info_list
+        port_info_list = _registry['port_info_list']
+        return port_info_list[port_info_list.lookup_path(port)]
+
+def get_abilities(model):
+    """Look up the gphoto2 CameraAbilities for a camera model name, from an abilities list that is loaded only once."""
+    with _registry_lock:
+        if 'abilities_list' not in _registry:
+            abilities_list = gp.CameraAbilitiesList()
+            abilities_list.load()
+            _registry['abilities_list'] = abilities_list
+        abilities_list = _registry['abilities_list']
+        return abilities_list[abilities_list.lookup_model(model)]
 
 def choose_camera():
     """
@@ -7,11 +54,8 @@ def choose_camera():
     return the correct port address.
     """
 
-    # Kill any existing gphoto processes to free up the USB ports for communication
-    command = f'killall gvfsd-gphoto2 gvfs-gphoto2-volume-monitor'
-    sp.call([command], shell=True)
-
-    camera_list = list(gp.Camera.autodetect()) # Find all available cameras
+    free_usb_ports()
+    camera_list = autodetect(refresh=True) # Find all available cameras
     if not camera_list:
         print('No camera detected. Make sure it is connected and turned on.')
         return
@@ -38,11 +82,8 @@ def detect_EOS_cameras():
     Detect all connected EOS cameras and return a list of their port addresses.
     """
 
-    # Kill any existing gphoto processes to free up the USB ports for communication
-    command = f'killall gvfsd-gphoto2 gvfs-gphoto2-volume-monitor'
-    sp.call([command], shell=True)
-
-    camera_list = list(gp.Camera.autodetect()) # Find all available cameras
+    free_usb_ports()
+    camera_list = autodetect(refresh=True) # Find all available cameras
     if not camera_list:
         print('No camera detected. Make sure it is connected and turned on.')
         return
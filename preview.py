@@ -0,0 +1,126 @@
+import threading, time, collections
+
+# A single preview frame: running index, host timestamps (time.perf_counter and time.time) taken right after the capture, and the JPEG data
+Frame = collections.namedtuple('Frame', ['index', 'timestamp', 'wall_time', 'data'])
+
+class PreviewService(object):
+    """
+    Capture preview frames continuously on a background thread, independently of the consumers.
+
+    Frames are kept in a fixed-size ring buffer. Consumers (UI, autofocus logic, detection models, ...) can fetch the
+    latest frame or block until the next one arrives, at whatever rate they run, without ever stalling the capture.
+    While the service is running it owns the camera's USB I/O: stop it before changing configurations or starting a capture.
+    """
+
+    def __init__(self, eos, buffer_size=8):
+        self.eos = eos
+        self.buffer_size = buffer_size
+        self._ring = collections.deque(maxlen=buffer_size)
+        self._fetched = set() # indices of frames in the ring that were handed to at least one consumer
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._times = collections.deque(maxlen=30) # timestamps of the most recent frames, for the effective fps
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.error = None
+
+    def start(self):
+        '''Start the capture thread.'''
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='EOS preview', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        '''Stop the capture thread and wait for it to finish, afterwards the camera can be used again.'''
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._condition:
+            self._condition.notify_all()
+        return self.stats()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        frames = self.eos.preview_frames(pool_size=2)
+        try:
+            for data in frames:
+                frame = Frame(self.frames_captured, time.perf_counter(), time.time(), bytes(data))
+                with self._condition:
+                    if len(self._ring) == self.buffer_size:
+                        evicted = self._ring[0].index
+                        if evicted in self._fetched:
+                            self._fetched.discard(evicted)
+                        else:
+                            self.frames_dropped += 1 # overwritten before any consumer looked at it
+                    self._ring.append(frame)
+                    self._times.append(frame.timestamp)
+                    self.frames_captured += 1
+                    self._condition.notify_all()
+                if self._stop.is_set():
+                    break
+        except Exception as err:
+            self.error = err
+            print(f"Preview capture stopped: {err}")
+        finally:
+            frames.close()
+
+    def latest(self):
+        '''
+        Get the most recent frame without waiting.
+        Output: Frame or None if no frame was captured yet
+        '''
+        with self._condition:
+            if not self._ring:
+                return None
+            frame = self._ring[-1]
+            self._fetched.add(frame.index)
+            return frame
+
+    def wait_next(self, after=None, timeout=None):
+        '''
+        Block until a frame newer than the given frame index arrives (or any frame, if after is None).
+        Input: after=int frame index (e.g. of the last frame you processed), timeout=seconds or None
+        Output: Frame, or None on timeout or if the service stopped
+        '''
+        with self._condition:
+            ready = lambda: (self._ring and (after is None or self._ring[-1].index > after)) or not self.running
+            if not self._condition.wait_for(ready, timeout) or not self._ring:
+                return None
+            frame = self._ring[-1]
+            if after is not None and frame.index <= after:
+                return None
+            self._fetched.add(frame.index)
+            return frame
+
+    def frames(self, timeout=None):
+        '''Generator over new frames as they arrive, skipping frames the consumer was too slow for.'''
+        index = None
+        while True:
+            frame = self.wait_next(index, timeout)
+            if frame is None:
+                return
+            index = frame.index
+            yield frame
+
+    def stats(self):
+        '''
+        Output: dict with the number of captured and dropped frames (captured but never fetched), and the effective fps over the most recent frames
+        '''
+        with self._condition:
+            fps = None
+            if len(self._times) > 1:
+                fps = (len(self._times) - 1) / (self._times[-1] - self._times[0])
+            return {'captured': self.frames_captured, 'dropped': self.frames_dropped, 'fps': fps}
@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading, statistics
+from capture import EOS
+import gphoto_util
+
+class CameraRig(object):
+    """
+    Control several Canon EOS R5 C cameras at once.
+
+    Each camera is driven by its own dedicated worker thread, so every command is sent to all cameras in parallel
+    and the results are gathered afterwards. A single camera is never accessed from two threads at the same time.
+    Results are always returned as lists in the same order as self.ports.
+    """
+
+    def __init__(self, ports=None, **kwargs):
+        '''
+        Open all given ports (or all detected EOS cameras) concurrently.
+        Any keyword arguments are passed on to EOS().
+        Cameras that fail to initialise are reported and left out of the rig.
+        '''
+        if ports is None:
+            ports = gphoto_util.detect_EOS_cameras() or []
+
+        workers = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'EOS {port}') for port in ports]
+        futures = [worker.submit(EOS, port=port, **kwargs) for worker, port in zip(workers, ports)]
+
+        self.ports = []
+        self.cameras = []
+        self.workers = []
+        for port, worker, future in zip(ports, workers, futures):
+            try:
+                camera = future.result()
+            except Exception as err:
+                print(f"Camera at port {port} could not be initialised: {err}")
+                worker.shutdown(wait=False)
+                continue
+            self.ports.append(port)
+            self.cameras.append(camera)
+            self.workers.append(worker)
+        print(f"Camera rig initialised with {len(self.cameras)} camera(s)")
+        for port, camera in zip(self.ports, self.cameras):
+            print(f"  {port}: " + ', '.join(f"{phase} {seconds:.2f} s" for phase, seconds in camera.init_times.items()))
+
+    def __len__(self):
+        return len(self.cameras)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def submit(self, method, *args, **kwargs):
+        '''
+        Queue a call of the named EOS method on every camera's worker thread without waiting for the results.
+        Output: list of concurrent.futures.Future, one per camera
+        '''
+        return [worker.submit(getattr(camera, method), *args, **kwargs) for worker, camera in zip(self.workers, self.cameras)]
+
+    def gather(self, futures):
+        '''
+        Wait for the futures returned by submit() and collect their results.
+        If a camera raised an error, the exception object is returned in its place, so that the results of all other cameras are kept.
+        Output: list of results, one per camera
+        '''
+        results = []
+        for port, future in zip(self.ports, futures):
+            try:
+                results.append(future.result())
+            except Exception as err:
+                print(f"Camera at port {port} failed: {err}")
+                results.append(err)
+        return results
+
+    def run(self, method, *args, **kwargs):
+        '''
+        Call the named EOS method on all cameras in parallel and wait for all of them to finish.
+        Output: list of results, one per camera
+        '''
+        return self.gather(self.submit(method, *args, **kwargs))
+
+    def run_each(self, method, kwargs_list):
+        '''
+        Call the named EOS method on all cameras in parallel, with separate keyword arguments for each camera.
+        Input: method name, list of dicts (one per camera, same order as self.ports)
+        Output: list of results, one per camera
+        '''
+        if len(kwargs_list) != len(self.cameras):
+            raise ValueError(f"Expected one set of arguments per camera ({len(self.cameras)}), got {len(kwargs_list)}")
+        futures = [worker.submit(getattr(camera, method), **kwargs) for worker, camera, kwargs in zip(self.workers, self.cameras, kwargs_list)]
+        return self.gather(futures)
+
+    def _per_camera(self, value):
+        '''Helper function to expand a single value to one value per camera, lists must hold exactly one entry per camera already.'''
+        if isinstance(value, (list, tuple)):
+            if len(value) != len(self.cameras):
+                raise ValueError(f"Expected one value per camera ({len(self.cameras)}), got {len(value)}")
+            return list(value)
+        return [value] * len(self.cameras)
+
+    def set_capture_parameters(self, aperture=None, iso=None, shutterspeed=None, c_AF=None):
+        '''Set the same capture parameters on all cameras, see EOS.set_capture_parameters().'''
+        return self.run('set_capture_parameters', aperture=aperture, iso=iso, shutterspeed=shutterspeed, c_AF=c_AF)
+
+    def capture_image(self, aperture=None, iso=None, shutterspeed=None, c_AF=None, download=True, target_path='.'):
+        '''
+        Capture a single image on all cameras, see EOS.capture_image().
+        The cameras may use the same file names, so target_path can also be a list with one directory per camera.
+        '''
+        kwargs_list = [dict(aperture=aperture, iso=iso, shutterspeed=shutterspeed, c_AF=c_AF, download=download, target_path=path) for path in self._per_camera(target_path)]
+        return self.run_each('capture_image', kwargs_list)
+
+    def capture_burst(self, t=0.5, save_timeout=5):
+        '''Shoot a burst on all cameras, see EOS.capture_burst().'''
+        return self.run('capture_burst', t=t, save_timeout=save_timeout)
+
+    def record_video(self, t=1, download=True, target_path='.', save_timeout=5):
+        '''
+        Record a full-res video on all cameras (VIDEO mode), see EOS.record_video().
+        target_path can also be a list with one directory per camera.
+        '''
+        kwargs_list = [dict(t=t, download=download, target_path=path, save_timeout=save_timeout) for path in self._per_camera(target_path)]
+        return self.run_each('record_video', kwargs_list)
+
+    def capture_synchronized(self, download=False, target_path='.', timeout=5):
+        '''
+        Fire all cameras as close together as possible (e.g. for photogrammetry).
+        Every camera is pre-armed on its own worker thread, then a shared barrier releases all of them at once,
+        so that the USB trigger writes start together. See EOS.capture_synchronized().
+        target_path can also be a list with one directory per camera.
+        Output: list of per-camera result dicts (host timestamps of trigger send and file added event), and a dict of skew statistics
+        '''
+        barrier = threading.Barrier(len(self.cameras))
+        kwargs_list = [dict(barrier=barrier, download=download, target_path=path, timeout=timeout) for path in self._per_camera(target_path)]
+        results = self.run_each('capture_synchronized', kwargs_list)
+        valid = [result for result in results if isinstance(result, dict)]
+        stats = {key: skew_statistics([result[key] for result in valid if result[key] is not None]) for key in ['trigger_send', 'trigger_sent', 'file_added']}
+        return results, stats
+
+    def close(self):
+        '''Release all cameras and stop the worker threads.'''
+        for future in self.submit('close'):
+            future.exception()
+        for worker in self.workers:
+            worker.shutdown(wait=True)
+        return
+
+
+def skew_statistics(timestamps):
+    '''
+    Summarise how far apart a set of host-side timestamps (seconds) are.
+    Output: dict with the number of timestamps, the skew (max - min), and the standard deviation, all in milliseconds; None if no timestamps are given
+    '''
+    if not timestamps:
+        return None
+    return {
+        'count': len(timestamps),
+        'skew_ms': (max(timestamps) - min(timestamps)) * 1000,
+        'std_ms': statistics.pstdev(timestamps) * 1000,
+    }
@@ -0,0 +1,27 @@
+import os, sys, types
+
+# the modules import each other by their plain names, see usage_examples.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import gphoto2
+except ImportError:
+    # Minimal stand-in for python-gphoto2, so that the helpers which never touch a camera can be tested without libgphoto2 installed.
+    # Only the names used at import time and by the event pump are provided.
+    gphoto2 = types.ModuleType('gphoto2')
+    gphoto2.GP_EVENT_UNKNOWN = 0
+    gphoto2.GP_EVENT_TIMEOUT = 1
+    gphoto2.GP_EVENT_FILE_ADDED = 2
+    gphoto2.GP_EVENT_FOLDER_ADDED = 3
+    gphoto2.GP_EVENT_CAPTURE_COMPLETE = 4
+    gphoto2.GP_ERROR_NOT_SUPPORTED = -6
+    gphoto2.GP_CAPTURE_MOVIE = 2
+    gphoto2.GP_FILE_TYPE_NORMAL = 1
+
+    class GPhoto2Error(Exception):
+        def __init__(self, code):
+            super().__init__(f'gphoto2 error {code}')
+            self.code = code
+
+    gphoto2.GPhoto2Error = GPhoto2Error
+    sys.modules['gphoto2'] = gphoto2
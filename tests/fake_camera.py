@@ -0,0 +1,177 @@
+import collections, time
+import gphoto2 as gp
+from capture import EOS
+from events import EventDispatcher, LockedCamera, CONFIG_CHANGED
+
+FileInfo = collections.namedtuple('FileInfo', ['file'])
+FileDetails = collections.namedtuple('FileDetails', ['size', 'mtime'])
+
+class FakeFile(object):
+    '''Stand-in for a gphoto2 CameraFile returned by file_get.'''
+
+    def __init__(self, data):
+        self.data = data
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.data)
+
+class FakeCamera(object):
+    """
+    Minimal stand-in for a gphoto2 Camera with a storage card, for testing the file transfer logic without a camera.
+    self.files maps camera paths to (data, mtime), self.calls records the transfer calls.
+    """
+
+    def __init__(self, files=None, partial_reads=True):
+        self.files = dict(files or {})
+        self.partial_reads = partial_reads
+        self.fail_after = None # raise an I/O error once this many bytes have been read
+        self.calls = []
+        self.bytes_read = 0
+
+    def folder_list_folders(self, path):
+        prefix = path.rstrip('/') + '/'
+        return sorted({(camera_path[len(prefix):].split('/')[0], None) for camera_path in self.files if camera_path.startswith(prefix)})
+
+    def folder_list_files(self, folder):
+        prefix = folder.rstrip('/') + '/'
+        return sorted((camera_path[len(prefix):], None) for camera_path in self.files
+                      if camera_path.startswith(prefix) and '/' not in camera_path[len(prefix):])
+
+    def file_get_info(self, folder, name):
+        data, mtime = self.files[folder + '/' + name]
+        return FileInfo(FileDetails(len(data), mtime))
+
+    def file_read(self, folder, name, file_type, offset, buffer):
+        if not self.partial_reads:
+            raise gp.GPhoto2Error(gp.GP_ERROR_NOT_SUPPORTED)
+        self.calls.append(('file_read', folder + '/' + name, offset))
+        data = self.files[folder + '/' + name][0][offset:offset + len(buffer)]
+        if self.fail_after is not None and self.bytes_read + len(data) > self.fail_after:
+            raise gp.GPhoto2Error(-7) # GP_ERROR_IO
+        buffer[:len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+    def file_get(self, folder, name, file_type):
+        self.calls.append(('file_get', folder + '/' + name))
+        return FakeFile(self.files[folder + '/' + name][0])
+
+def make_eos(camera):
+    '''An EOS object driving the fake camera, without the connection set-up of EOS.__init__.'''
+    eos = EOS.__new__(EOS)
+    eos.camera = camera
+    eos.last_transfer_time = None
+    return eos
+
+class FakeWidget(object):
+    '''Stand-in for a gphoto2 CameraWidget (a named value with choices and children).'''
+
+    def __init__(self, name, value=None, children=(), choices=()):
+        self.name = name
+        self.value = value
+        self.children = list(children)
+        self.choices = list(choices)
+
+    def get_name(self):
+        return self.name
+
+    def get_value(self):
+        return self.value
+
+    def set_value(self, value):
+        self.value = value
+
+    def get_choices(self):
+        return self.choices
+
+    def count_children(self):
+        return len(self.children)
+
+    def get_child(self, i):
+        return self.children[i]
+
+class ConfigCamera(object):
+    """
+    Minimal stand-in for a gphoto2 Camera with a flat configuration tree, for testing the config cache.
+    self.values holds the camera's current settings, self.choices their choice lists, self.calls records every read and write.
+    """
+
+    def __init__(self, values, choices=None):
+        self.values = dict(values)
+        self.choices = dict(choices or {})
+        self.calls = []
+
+    def get_config(self):
+        self.calls.append(('get_config',))
+        return FakeWidget('main', children=[FakeWidget(name, value, choices=self.choices.get(name, ())) for name, value in self.values.items()])
+
+    def get_single_config(self, name):
+        self.calls.append(('get_single_config', name))
+        return FakeWidget(name, self.values[name], choices=self.choices.get(name, ()))
+
+    def set_single_config(self, name, widget):
+        self.calls.append(('set_single_config', name, widget.get_value()))
+        self.values[name] = widget.get_value()
+
+def make_config_eos(values, choices=None):
+    '''An EOS object (PHOTO mode) with its configuration cache filled from a ConfigCamera, without the connection set-up of EOS.__init__.'''
+    eos = EOS.__new__(EOS)
+    eos.camera = ConfigCamera(values, choices)
+    eos.config_ttl = None
+    eos.single_config = None
+    eos.mode = 0
+    eos.refresh_config()
+    eos.camera.calls.clear()
+    return eos
+
+CameraPath = collections.namedtuple('CameraPath', ['folder', 'name'])
+
+class ShootingCamera(ConfigCamera):
+    """
+    ConfigCamera that takes pictures: pressing eosremoterelease announces new files through wait_for_event (burst_size files
+    in continuous drive mode, one otherwise), and file_get serves them. Set file_get_error to an exception to make downloads fail.
+    """
+
+    def __init__(self, values, burst_size=3):
+        super().__init__(values)
+        self.burst_size = burst_size
+        self.events = collections.deque()
+        self.file_get_error = None
+        self.shots = 0
+
+    def set_single_config(self, name, widget):
+        super().set_single_config(name, widget)
+        if name == 'eosremoterelease' and widget.get_value() == 'Immediate':
+            for _ in range(self.burst_size if self.values.get('drivemode') != 'Single' else 1):
+                self.shots += 1
+                self.events.append((gp.GP_EVENT_FILE_ADDED, CameraPath('/store_00020001/DCIM/100CANON', f'IMG_{self.shots:04d}.JPG')))
+
+    def wait_for_event(self, timeout_ms):
+        if self.events:
+            return self.events.popleft()
+        time.sleep(timeout_ms / 1000)
+        return gp.GP_EVENT_TIMEOUT, None
+
+    def file_get(self, folder, name, file_type):
+        self.calls.append(('file_get', folder + '/' + name))
+        if self.file_get_error is not None:
+            raise self.file_get_error
+        return FakeFile(name.encode())
+
+def make_shooting_eos(values=None, burst_size=3):
+    '''An EOS object (PHOTO mode, set-up done) driving a ShootingCamera, with its event pump running. Stop it with eos.events.stop().'''
+    eos = EOS.__new__(EOS)
+    eos.camera = LockedCamera(ShootingCamera(dict({'eosremoterelease': 'None', 'drivemode': 'Single'}, **(values or {})), burst_size))
+    eos.config_ttl = None
+    eos.single_config = None
+    eos.mode = 0
+    eos.setup_done = True
+    eos.last_transfer_time = None
+    eos.last_hold_duration = None
+    eos.last_camera_path = None
+    eos.refresh_config()
+    eos.events = EventDispatcher(eos.camera, poll_ms=1)
+    eos.events.subscribe(CONFIG_CHANGED, eos._on_config_changed)
+    eos.events.start()
+    return eos
@@ -0,0 +1,47 @@
+import os, threading
+import pytest
+import gphoto2 as gp
+from fake_camera import make_shooting_eos
+
+@pytest.fixture
+def eos():
+    eos = make_shooting_eos()
+    yield eos
+    eos.events.stop()
+
+def test_burst_downloads_and_resets_the_camera(eos, tmp_path):
+    success, files, msg = eos.capture_burst(t=0.1, save_timeout=0.2, download=True, target_path=str(tmp_path))
+    assert success, msg
+    assert sorted(os.listdir(tmp_path)) == ['IMG_0001.JPG', 'IMG_0002.JPG', 'IMG_0003.JPG']
+    assert files == [str(tmp_path / name) for name in ['IMG_0001.JPG', 'IMG_0002.JPG', 'IMG_0003.JPG']]
+    assert eos.camera.values['eosremoterelease'] == 'Release Full'
+    assert eos.camera.values['drivemode'] == 'Single'
+    assert eos.last_hold_duration >= 0.1
+
+def test_burst_without_download_lists_camera_files(eos):
+    success, files, msg = eos.capture_burst(t=0.1, save_timeout=0.2)
+    assert success, msg
+    assert files == ['/store_00020001/DCIM/100CANON/IMG_000%d.JPG' % i for i in range(1, 4)]
+    assert eos.events.pop_unclaimed_files() == []
+
+def test_burst_reports_failed_transfers(eos, tmp_path):
+    eos.camera._camera.file_get_error = gp.GPhoto2Error(-7) # GP_ERROR_IO
+    success, files, msg = eos.capture_burst(t=0.1, save_timeout=0.2, download=True, target_path=str(tmp_path))
+    assert not success
+    assert msg == '3 of 3 files could not be downloaded, 0 could not be written'
+    assert os.listdir(tmp_path) == []
+    assert eos.camera.values['drivemode'] == 'Single'
+
+def test_burst_cleans_up_after_an_interruption(eos, tmp_path):
+    eos.camera._camera.file_get_error = KeyboardInterrupt()
+    eos.last_transfer_time = 0.001 # fetch the first file while the trigger is still held
+    threads = threading.active_count()
+    with pytest.raises(KeyboardInterrupt):
+        eos.capture_burst(t=0.1, save_timeout=0.2, download=True, target_path=str(tmp_path))
+    # the trigger is released, the drive mode restored, the writer threads stopped and the file subscription removed
+    assert eos.camera.values['eosremoterelease'] == 'Release Full'
+    assert eos.camera.values['drivemode'] == 'Single'
+    assert threading.active_count() == threads
+    eos.camera._camera.file_get_error = None
+    success, file_path, msg = eos.capture_immediate(download=False)
+    assert success, msg
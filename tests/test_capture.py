@@ -0,0 +1,95 @@
+import itertools, os, time
+import pytest
+import capture
+from capture import EOS, parse_property_event, plan_sweep, reserve_output_file
+from events import Event, CONFIG_CHANGED
+from fake_camera import make_config_eos
+
+@pytest.fixture
+def raw_sharpness(monkeypatch):
+    '''Let the test frames be their own sharpness values.'''
+    monkeypatch.setattr(capture, 'preview_sharpness', lambda frame, roi=None: frame)
+
+def test_focus_settles_only_after_the_lens_moved(raw_sharpness):
+    eos = EOS.__new__(EOS)
+    frames = iter([10, 10.1, 10, 20, 30, 30.5, 50])
+    sharpness, waited, settled = eos.wait_for_focus_settled(frames, reference=10)
+    assert settled
+    assert sharpness == 30.5 # the frames at the old position did not confirm the step
+
+def test_focus_step_without_sharpness_change_ends_at_timeout(raw_sharpness):
+    eos = EOS.__new__(EOS)
+    sharpness, waited, settled = eos.wait_for_focus_settled(itertools.repeat(10), reference=10, timeout=0.05)
+    assert settled
+    assert waited >= 0.05
+
+def test_focus_still_moving_at_timeout(raw_sharpness):
+    eos = EOS.__new__(EOS)
+    sharpness, waited, settled = eos.wait_for_focus_settled(itertools.cycle([20, 30]), reference=10, timeout=0.05)
+    assert not settled
+
+def property_changed(data):
+    return Event(CONFIG_CHANGED, data, time.perf_counter())
+
+def test_property_change_rereads_only_the_changed_widget():
+    eos = make_config_eos({'aperture': '4', 'iso': '100', 'shutterspeed': '1/50'})
+    eos.camera.values['iso'] = '800' # dial turned on the camera
+    eos._on_config_changed(property_changed('PTP Property d103 changed'))
+    assert eos.get_widget('aperture').get_value() == '4'
+    assert eos.camera.calls == [] # other widgets stay cached
+    assert eos.get_widget('iso').get_value() == '800'
+    assert eos.camera.calls == [('get_single_config', 'iso')]
+    eos.get_widget('iso')
+    assert len(eos.camera.calls) == 1
+
+def test_property_change_right_after_a_read_is_not_ignored():
+    eos = make_config_eos({'aperture': '4', 'iso': '100', 'shutterspeed': '1/50'})
+    eos.read_config_values(['shutterspeed'])
+    eos.camera.values['shutterspeed'] = '1/100' # e.g. auto exposure moved it
+    eos._on_config_changed(property_changed('PTP Property d102 changed'))
+    assert eos.get_widget('shutterspeed').get_value() == '1/100'
+
+def test_property_change_echoing_the_cached_value_is_ignored():
+    eos = make_config_eos({'aperture': '4', 'iso': '100', 'shutterspeed': '1/50'})
+    eos._on_config_changed(property_changed('PTP Property d101 changed, "aperture" to "4"'))
+    eos.get_widget('aperture')
+    assert eos.camera.calls == []
+
+def test_reserve_output_file(tmp_path):
+    directory = str(tmp_path / 'videos')
+    first, seq = reserve_output_file(directory, 'clip_{name}_{seq:03d}', {'name': 'a'}, '.mp4')
+    assert first == os.path.join(directory, 'clip_a_000.mp4')
+    assert os.path.exists(first) # placeholder created
+    assert seq == 1
+    second, seq = reserve_output_file(directory, 'clip_{name}_{seq:03d}', {'name': 'a'}, '.mp4')
+    assert second == os.path.join(directory, 'clip_a_001.mp4')
+    # restarting the count skips names that are taken
+    third, seq = reserve_output_file(directory, 'clip_{name}_{seq:03d}', {'name': 'a'}, '.mp4', seq=0)
+    assert third == os.path.join(directory, 'clip_a_002.mp4')
+    assert seq == 3
+
+def test_reserve_output_file_without_seq_field(tmp_path):
+    first, seq = reserve_output_file(str(tmp_path), 'take', {}, '.mp4')
+    second, seq = reserve_output_file(str(tmp_path), 'take', {}, '.mp4')
+    assert os.path.basename(first) == 'take.mp4'
+    assert os.path.basename(second) == 'take_1.mp4'
+
+def test_parse_property_event():
+    assert parse_property_event('PTP Property d103 changed') == (0xd103, None, None)
+    assert parse_property_event('PTP Property d101 changed, "aperture" to "5.6"') == (0xd101, 'aperture', '5.6')
+    assert parse_property_event('something else') == (None, None, None)
+
+def test_plan_sweep_changes_one_setting_per_shot():
+    axes = [('aperture', [4, 8, 16]), ('shutterspeed', ['1/50', '1/100']), ('iso', [100, 200, 400])]
+    plan = plan_sweep(axes)
+    combinations = set(itertools.product(*(values for config_name, values in axes)))
+    assert len(plan) == len(combinations)
+    assert {(shot['aperture'], shot['shutterspeed'], shot['iso']) for shot in plan} == combinations
+    for previous, shot in zip(plan, plan[1:]):
+        assert sum(previous[key] != shot[key] for key in shot) == 1
+    assert plan[0] == {'aperture': 4, 'shutterspeed': '1/50', 'iso': 100} # starts with the first value of every axis
+
+def test_plan_sweep_edge_cases():
+    assert plan_sweep([]) == [{}]
+    assert plan_sweep([('iso', [100, 200])]) == [{'iso': 100}, {'iso': 200}]
+    assert plan_sweep([('iso', [100, 200]), ('aperture', [])]) == []
@@ -0,0 +1,55 @@
+import threading
+from capture import load_manifest
+from fake_camera import make_config_eos
+
+SETTINGS = {'cameramodel': 'Canon EOS R5 C', 'serialnumber': '123', 'lensname': 'RF24-105mm', 'autoexposuremodedial': 'Fv',
+            'aperture': '4', 'shutterspeed': '1/50', 'iso': '100'}
+CHOICES = {'aperture': ['4', '5.6', '8'], 'shutterspeed': ['bulb', '1/50', '1/100'], 'iso': ['Auto', '100', '200']}
+
+def test_discovered_choices_are_cached(tmp_path):
+    eos = make_config_eos(SETTINGS, CHOICES)
+    eos.choice_cache = str(tmp_path / 'choices.json')
+    choices = eos.load_choices()
+    assert choices == {'aperture': [4.0, 5.6, 8.0], 'shutterspeed': ['1/50', '1/100'], 'iso': [100, 200]}
+    assert eos.shutter_table.closest(1/60) == '1/50'
+    cache = load_manifest(eos.choice_cache)
+    assert list(cache) == [eos.choice_cache_key()]
+    assert '|Fv|' in eos.choice_cache_key()
+
+    eos.camera.calls.clear()
+    assert eos.load_choices() == choices
+    assert eos.camera.calls == [] # read from the cache
+
+def test_fallback_choices_are_not_cached(tmp_path):
+    eos = make_config_eos(dict(SETTINGS, autoexposuremodedial='Av'), dict(CHOICES, shutterspeed=[])) # no shutter speeds in Av
+    eos.choice_cache = str(tmp_path / 'choices.json')
+    choices = eos.load_choices()
+    assert '1/8000' in choices['shutterspeed'] # the R5 C defaults
+    assert load_manifest(eos.choice_cache) == {}
+
+def test_cameras_discover_in_parallel_and_merge(tmp_path):
+    cache_file = str(tmp_path / 'choices.json')
+    inside = threading.Barrier(2, timeout=2)
+    cameras = []
+    for serial in ['1', '2']:
+        eos = make_config_eos(dict(SETTINGS, serialnumber=serial), CHOICES)
+        eos.choice_cache = cache_file
+        discover = eos.discover_choices
+        def both_discovering(discover=discover):
+            inside.wait() # fails with BrokenBarrierError if discovery runs one camera at a time
+            return discover()
+        eos.discover_choices = both_discovering
+        cameras.append(eos)
+    errors = []
+    def load(eos):
+        try:
+            eos.load_choices()
+        except Exception as err:
+            errors.append(err)
+    threads = [threading.Thread(target=load, args=(eos,)) for eos in cameras]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(load_manifest(cache_file)) == 2
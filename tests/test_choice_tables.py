@@ -0,0 +1,39 @@
+import pytest
+from capture import parse_numeric, ChoiceTable
+
+def test_parse_numeric():
+    assert parse_numeric(25) == 25.0
+    assert parse_numeric(0.5) == 0.5
+    assert parse_numeric('10.3') == pytest.approx(10.3)
+    assert parse_numeric(' 4 ') == 4.0
+    assert parse_numeric('1/50') == pytest.approx(0.02)
+
+@pytest.mark.parametrize('value', ['bulb', 'Auto', '', '1/0', None, '__import__("os").getcwd()', '2**10'])
+def test_parse_numeric_rejects_non_numbers(value):
+    assert parse_numeric(value) is None
+
+def test_choice_table_closest():
+    table = ChoiceTable([4, 5.6, 8, 11])
+    assert table.closest(5.6) == 5.6
+    assert table.closest(6) == 5.6
+    assert table.closest(7.9) == 8
+    assert table.closest(1) == 4 # below the smallest choice
+    assert table.closest(100) == 11 # above the largest choice
+
+def test_choice_table_tie_picks_lower_value():
+    table = ChoiceTable([100, 200, 400])
+    assert table.closest(150) == 100
+    assert table.closest(300) == 200
+
+def test_choice_table_keeps_camera_strings():
+    table = ChoiceTable(['1/60', 'bulb', '1/50', '30'])
+    assert table.sorted_choices == ['1/60', '1/50', '30'] # sorted by value, non-numeric choices left out
+    assert table.closest(1/55) == '1/60'
+    assert table.closest(1000) == '30'
+    assert '1/50' in table
+    assert 'bulb' in table # exact matches are still allowed
+    assert '1/40' not in table
+
+def test_choice_table_empty():
+    assert ChoiceTable([]).closest(5) is None
+    assert ChoiceTable(['Auto']).closest(5) is None
@@ -0,0 +1,92 @@
+import collections, time
+import gphoto2 as gp
+from events import EventDispatcher, Event, FILE_ADDED, CONFIG_CHANGED, CAPTURE_COMPLETE, TIMEOUT
+
+def make_event(kind, data=None):
+    return Event(kind, data, time.perf_counter())
+
+def test_dispatcher_routes_to_expectations_in_order():
+    events = EventDispatcher(camera=None)
+    first = events.expect(FILE_ADDED)
+    second = events.expect(FILE_ADDED)
+    events.dispatch(make_event(FILE_ADDED, 'IMG_1.JPG'))
+    assert first.result(0).data == 'IMG_1.JPG'
+    assert not second.done()
+    events.dispatch(make_event(FILE_ADDED, 'IMG_2.JPG'))
+    assert second.result(0).data == 'IMG_2.JPG'
+    assert events.counts[FILE_ADDED] == 2
+    assert events.pop_unclaimed_files() == []
+
+def test_dispatcher_predicate_and_kinds():
+    events = EventDispatcher(camera=None)
+    raw = events.expect(FILE_ADDED, predicate=lambda event: event.data.endswith('.CR3'))
+    config = events.expect(CONFIG_CHANGED)
+    events.dispatch(make_event(FILE_ADDED, 'IMG_1.JPG'))
+    events.dispatch(make_event(FILE_ADDED, 'IMG_1.CR3'))
+    assert raw.result(0).data == 'IMG_1.CR3'
+    assert not config.done()
+    assert [event.data for event in events.pop_unclaimed_files()] == ['IMG_1.JPG']
+
+def test_dispatcher_cancel():
+    events = EventDispatcher(camera=None)
+    future = events.expect(FILE_ADDED)
+    events.cancel(FILE_ADDED, future)
+    assert future.cancelled()
+    events.dispatch(make_event(FILE_ADDED, 'IMG_1.JPG'))
+    # the withdrawn expectation must not swallow the file
+    assert [event.data for event in events.pop_unclaimed_files()] == ['IMG_1.JPG']
+
+def test_dispatcher_subscribers():
+    events = EventDispatcher(camera=None)
+    received = []
+    def failing(event):
+        raise RuntimeError('subscriber error')
+    events.subscribe(CONFIG_CHANGED, failing)
+    events.subscribe(CONFIG_CHANGED, received.append)
+    events.dispatch(make_event(CONFIG_CHANGED, 'PTP Property d103 changed'))
+    assert [event.data for event in received] == ['PTP Property d103 changed']
+    events.unsubscribe(CONFIG_CHANGED, received.append)
+    events.dispatch(make_event(CONFIG_CHANGED, 'PTP Property d101 changed'))
+    assert len(received) == 1
+    # files announced to a subscriber are not kept as unclaimed
+    events.subscribe(FILE_ADDED, received.append)
+    events.dispatch(make_event(FILE_ADDED, 'IMG_1.JPG'))
+    assert events.pop_unclaimed_files() == []
+
+class QueueCamera(object):
+    '''Replays a list of (event type, event data) tuples through wait_for_event, then times out.'''
+
+    def __init__(self, events):
+        self.events = collections.deque(events)
+
+    def wait_for_event(self, timeout_ms):
+        if self.events:
+            return self.events.popleft()
+        time.sleep(timeout_ms / 1000)
+        return gp.GP_EVENT_TIMEOUT, None
+
+def test_event_pump_routing():
+    camera = QueueCamera([
+        (gp.GP_EVENT_FILE_ADDED, 'IMG_1.JPG'),
+        (gp.GP_EVENT_UNKNOWN, 'PTP Property d103 changed'),
+        (gp.GP_EVENT_UNKNOWN, 'Button 1'), # not a property change, ignored
+        (gp.GP_EVENT_CAPTURE_COMPLETE, None),
+    ])
+    events = EventDispatcher(camera, poll_ms=1)
+    pending = events.expect(FILE_ADDED)
+    events.start()
+    try:
+        assert pending.result(2).data == 'IMG_1.JPG'
+        assert events.wait_for(CAPTURE_COMPLETE, 2, after=0)
+        assert events.flush(2)
+        assert events.counts[CONFIG_CHANGED] == 1
+    finally:
+        events.stop()
+    assert events.counts[TIMEOUT] > 0
+
+def test_stop_cancels_pending_expectations():
+    events = EventDispatcher(QueueCamera([]), poll_ms=1).start()
+    future = events.expect(FILE_ADDED)
+    events.stop()
+    assert future.cancelled()
+    assert not events.running
@@ -0,0 +1,94 @@
+import os
+import pytest
+import gphoto2 as gp
+from capture import load_manifest
+from fake_camera import FakeCamera, make_eos
+
+DCIM = '/store_00020001/DCIM'
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_stream_file_in_chunks(tmp_path):
+    data = bytes(range(256)) * 40
+    camera = FakeCamera({DCIM + '/100CANON/MVI_0001.MP4': (data, 1000)})
+    progress = []
+    stats = make_eos(camera).stream_file(DCIM + '/100CANON', 'MVI_0001.MP4', str(tmp_path / 'clip.mp4'), chunk_size=4096,
+                                         progress=lambda done, total, seconds: progress.append((done, total)))
+    assert read(tmp_path / 'clip.mp4') == data
+    assert stats['bytes'] == len(data)
+    assert [call[2] for call in camera.calls] == [0, 4096, 8192]
+    assert progress == [(4096, len(data)), (8192, len(data)), (len(data), len(data))]
+    assert os.listdir(tmp_path) == ['clip.mp4']
+
+def test_stream_file_failure_leaves_no_file(tmp_path):
+    camera = FakeCamera({DCIM + '/100CANON/MVI_0001.MP4': (b'a' * 10000, 1000)})
+    camera.fail_after = 5000
+    with pytest.raises(gp.GPhoto2Error):
+        make_eos(camera).stream_file(DCIM + '/100CANON', 'MVI_0001.MP4', str(tmp_path / 'clip.mp4'), chunk_size=4096)
+    assert os.listdir(tmp_path) == []
+
+def test_stream_file_without_partial_reads(tmp_path):
+    camera = FakeCamera({DCIM + '/100CANON/IMG_0001.JPG': (b'jpeg', 1000)}, partial_reads=False)
+    make_eos(camera).stream_file(DCIM + '/100CANON', 'IMG_0001.JPG', str(tmp_path / 'img.jpg'))
+    assert read(tmp_path / 'img.jpg') == b'jpeg'
+    assert camera.calls == [('file_get', DCIM + '/100CANON/IMG_0001.JPG')]
+    assert os.listdir(tmp_path) == ['img.jpg']
+
+def test_sync_media_downloads_and_skips(tmp_path):
+    camera = FakeCamera({DCIM + '/100CANON/IMG_0001.CR3': (b'a' * 100, 1000), DCIM + '/100CANON/IMG_0002.CR3': (b'b' * 50, 1001),
+                         DCIM + '/101CANON/MVI_0003.MP4': (b'c' * 300, 1002)})
+    eos = make_eos(camera)
+    success, downloaded, msg = eos.sync_media(str(tmp_path))
+    assert success
+    assert len(downloaded) == 3
+    assert read(tmp_path / '100CANON' / 'IMG_0002.CR3') == b'b' * 50
+    assert read(tmp_path / '101CANON' / 'MVI_0003.MP4') == b'c' * 300
+    manifest = load_manifest(str(tmp_path / '.sync_manifest.json'))
+    assert manifest[DCIM + '/100CANON/IMG_0001.CR3'] == {'size': 100, 'mtime': 1000}
+
+    # a second sync transfers nothing, a new file on the camera is added
+    camera.files[DCIM + '/101CANON/IMG_0004.CR3'] = (b'd' * 10, 1003)
+    camera.calls.clear()
+    success, downloaded, msg = eos.sync_media(str(tmp_path))
+    assert success
+    assert downloaded == [str(tmp_path / '101CANON' / 'IMG_0004.CR3')]
+    assert msg == '1 files downloaded, 3 already up to date'
+    assert {call[1] for call in camera.calls} == {DCIM + '/101CANON/IMG_0004.CR3'}
+
+def test_sync_media_redownloads_changed_file_of_same_size(tmp_path):
+    camera = FakeCamera({DCIM + '/100CANON/IMG_0001.JPG': (b'old!', 1000)})
+    eos = make_eos(camera)
+    eos.sync_media(str(tmp_path))
+    camera.files[DCIM + '/100CANON/IMG_0001.JPG'] = (b'new!', 2000) # same size, new content and mtime
+    success, downloaded, msg = eos.sync_media(str(tmp_path), full_check=True)
+    assert success
+    assert msg == '1 files downloaded, 0 already up to date'
+    assert read(tmp_path / '100CANON' / 'IMG_0001.JPG') == b'new!'
+    assert load_manifest(str(tmp_path / '.sync_manifest.json'))[DCIM + '/100CANON/IMG_0001.JPG']['mtime'] == 2000
+
+def test_sync_media_adopts_files_from_a_sync_without_manifest(tmp_path):
+    camera = FakeCamera({DCIM + '/100CANON/IMG_0001.JPG': (b'data', 1000)})
+    os.makedirs(tmp_path / '100CANON')
+    (tmp_path / '100CANON' / 'IMG_0001.JPG').write_bytes(b'data')
+    success, downloaded, msg = make_eos(camera).sync_media(str(tmp_path))
+    assert success
+    assert downloaded == []
+    assert camera.calls == []
+    assert DCIM + '/100CANON/IMG_0001.JPG' in load_manifest(str(tmp_path / '.sync_manifest.json'))
+
+def test_sync_media_resumes_after_failure(tmp_path):
+    camera = FakeCamera({DCIM + '/100CANON/IMG_0001.CR3': (b'a' * 100, 1000), DCIM + '/100CANON/IMG_0002.CR3': (b'b' * 100, 1001)})
+    camera.fail_after = 150 # the second file breaks off half way
+    eos = make_eos(camera)
+    success, downloaded, msg = eos.sync_media(str(tmp_path))
+    assert not success
+    assert downloaded == [str(tmp_path / '100CANON' / 'IMG_0001.CR3')]
+    assert sorted(os.listdir(tmp_path / '100CANON')) == ['IMG_0001.CR3'] # no partial file left behind
+    camera.fail_after = None
+    camera.calls.clear()
+    success, downloaded, msg = eos.sync_media(str(tmp_path))
+    assert success
+    assert downloaded == [str(tmp_path / '100CANON' / 'IMG_0002.CR3')]
+    assert read(tmp_path / '100CANON' / 'IMG_0002.CR3') == b'b' * 100
@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from rig import CameraRig, skew_statistics
+
+class RecordingCamera(object):
+    '''Stand-in for an EOS object that only records which methods were called.'''
+
+    def __init__(self):
+        self.calls = []
+
+    def capture_image(self, **kwargs):
+        self.calls.append(('capture_image', kwargs))
+        return True, kwargs['target_path'], 'saved'
+
+    def capture_synchronized(self, **kwargs):
+        self.calls.append(('capture_synchronized', kwargs))
+        return {}
+
+def make_rig(n):
+    '''A CameraRig with n fake cameras, without detecting or opening any camera.'''
+    rig = CameraRig.__new__(CameraRig)
+    rig.ports = [f'usb:fake{i}' for i in range(n)]
+    rig.cameras = [RecordingCamera() for _ in range(n)]
+    rig.workers = [ThreadPoolExecutor(max_workers=1) for _ in range(n)]
+    return rig
+
+def test_per_camera_target_paths():
+    rig = make_rig(3)
+    results = rig.capture_image(target_path=['a', 'b', 'c'])
+    assert [result[1] for result in results] == ['a', 'b', 'c']
+    results = rig.capture_image(target_path='.')
+    assert [result[1] for result in results] == ['.', '.', '.']
+
+@pytest.mark.parametrize('paths', [['./cam0', './cam1'], ['a', 'b', 'c', 'd', 'e']])
+def test_target_path_list_must_match_the_rig(paths):
+    rig = make_rig(4)
+    with pytest.raises(ValueError):
+        rig.capture_image(target_path=paths)
+    with pytest.raises(ValueError):
+        rig.capture_synchronized(target_path=paths)
+    with pytest.raises(ValueError):
+        rig.run_each('capture_image', [{'target_path': path} for path in paths])
+    assert all(camera.calls == [] for camera in rig.cameras) # no camera was fired
+
+def test_skew_statistics():
+    assert skew_statistics([]) is None
+    stats = skew_statistics([10.0, 10.001, 10.004])
+    assert stats['count'] == 3
+    assert stats['skew_ms'] == pytest.approx(4)
+    assert stats['std_ms'] == pytest.approx(1.6997, abs=1e-3)
+    assert skew_statistics([5.0])['skew_ms'] == 0
@@ -0,0 +1,49 @@
+import time
+import pytest
+from timelapse import Timelapse
+
+class TimelapseCamera(object):
+    '''Stand-in for an EOS object: capture_immediate takes capture_time seconds, downloads are recorded.'''
+
+    def __init__(self, serial, capture_time=0.0):
+        self.serial = serial
+        self.capture_time = capture_time
+        self.last_camera_path = None
+        self.last_transfer_time = 0.001
+        self.captured = 0
+        self.downloads = []
+
+    def get_serial_number(self):
+        return self.serial
+
+    def capture_immediate(self, download=False):
+        time.sleep(self.capture_time)
+        self.captured += 1
+        self.last_camera_path = f'/store/DCIM/IMG_{self.captured:04d}.JPG'
+        return True, None, 'saved to camera'
+
+    def download_file(self, camera_path, target_file):
+        self.downloads.append((camera_path, target_file))
+        return target_file
+
+def test_timelapse_counts_shots_and_downloads(tmp_path):
+    cameras = [TimelapseCamera('A'), TimelapseCamera('B')]
+    stats = Timelapse(cameras, interval=0.05, count=4, target_path=str(tmp_path)).run()
+    assert stats['slots'] == 4
+    assert stats['shots'] == [4, 4]
+    assert stats['missed'] == [0, 0]
+    assert stats['downloaded'] == [4, 4]
+    assert stats['pending'] == [0, 0]
+    # with several cameras and a single directory, every camera gets its own subdirectory
+    assert cameras[1].downloads[0][1] == str(tmp_path / 'B' / 'IMG_0001.JPG')
+
+def test_timelapse_skips_slots_of_a_busy_camera(tmp_path):
+    slow, fast = TimelapseCamera('slow', capture_time=0.25), TimelapseCamera('fast')
+    stats = Timelapse([slow, fast], interval=0.1, count=6, download=False, target_path=str(tmp_path)).run()
+    assert stats['shots'][1] == 6
+    assert stats['shots'][0] + stats['missed'][0] == 6 # every slot is either shot or counted as missed, never shifted
+    assert stats['missed'][0] >= 2
+
+def test_timelapse_target_path_list_must_match_the_cameras(tmp_path):
+    with pytest.raises(ValueError):
+        Timelapse([TimelapseCamera('A'), TimelapseCamera('B')], interval=1, target_path=[str(tmp_path)])
@@ -0,0 +1,223 @@
+import threading, time, collections, os, math
+from concurrent.futures import ThreadPoolExecutor
+from timing import wait_until
+
+# One scheduled shot of one camera: slot number, camera index, scheduled and actual start time (time.perf_counter),
+# camera path of the image (None if the shot failed or was missed), and an error message (None if successful)
+Shot = collections.namedtuple('Shot', ['slot', 'camera', 'scheduled', 'started', 'camera_path', 'error'])
+
+class Timelapse(object):
+    """
+    Capture images at a fixed interval with one or several Canon EOS R5 C cameras, in PHOTO mode.
+
+    Slot k fires at start + k * interval on the monotonic clock, so the time spent capturing and downloading never adds up to drift.
+    Every camera is triggered (EOS.capture_immediate()) on its own worker thread, which then downloads images in the time left
+    until the next slot; the scheduling thread never touches the cameras itself. If a camera is still busy when its next slot comes up,
+    or the scheduler wakes up too late, the slot is skipped and counted as missed instead of shifting the schedule.
+    Only counters, the most recent shots and a bounded list of files waiting for download are kept in memory, so a timelapse can run for days.
+    """
+
+    def __init__(self, cameras, interval, count=None, duration=None, download=True, target_path='.', history=1000, max_pending=10000, max_late=None):
+        '''
+        Input: cameras=EOS, list of EOS, or a CameraRig (its worker threads are used)
+                interval=seconds between slots, count=number of slots and/or duration=seconds (both None == run until stop() is called)
+                download=bool, target_path=string or list with one directory per camera (with a single string and several cameras,
+                each camera gets a subdirectory named after its serial number)
+                history=number of recent shots kept in self.history, max_pending=number of images per camera waiting for download
+                max_late=seconds a slot may start late before it is skipped (default: a quarter of the interval)
+        '''
+        if hasattr(cameras, 'workers'): # CameraRig
+            self.cameras = list(cameras.cameras)
+            self.workers = list(cameras.workers)
+            self._own_workers = False
+        else:
+            self.cameras = list(cameras) if isinstance(cameras, (list, tuple)) else [cameras]
+            self.workers = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'Timelapse {i}') for i in range(len(self.cameras))]
+            self._own_workers = True
+
+        if isinstance(target_path, (list, tuple)):
+            if len(target_path) != len(self.cameras):
+                raise ValueError(f"Expected one target path per camera ({len(self.cameras)}), got {len(target_path)}")
+            self.target_paths = list(target_path)
+        elif len(self.cameras) > 1:
+            self.target_paths = [os.path.join(target_path, camera.get_serial_number()) for camera in self.cameras]
+        else:
+            self.target_paths = [target_path]
+        if download:
+            for path in self.target_paths:
+                os.makedirs(path, exist_ok=True)
+
+        self.interval = interval
+        self.count = count
+        self.duration = duration
+        self.download = download
+        self.max_late = interval / 4 if max_late is None else max_late
+        self.history = collections.deque(maxlen=history) # the most recent Shots of all cameras
+        self.start_time = None
+        self.slots = 0 # number of slots scheduled so far
+
+        n = len(self.cameras)
+        self.shots = [0] * n
+        self.missed = [0] * n
+        self.errors = [0] * n
+        self.downloaded = [0] * n
+        self.not_downloaded = [0] * n # images left on the camera because the download queue was full, fetch them later with EOS.sync_media()
+        self._pending = [collections.deque() for _ in range(n)]
+        self.max_pending = max_pending
+        self._late_sum = [0.0] * n
+        self._late_max = [0.0] * n
+        self._busy = [None] * n
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        '''Run the timelapse on a background thread, see run().'''
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name='Timelapse', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        '''
+        Stop scheduling new slots, wait for running captures and the remaining downloads to finish.
+        Output: see stats()
+        '''
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stats()
+
+    def wait(self, timeout=None):
+        '''Block until a timelapse started with start() has finished all its slots (or timeout seconds have passed).'''
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self._thread is None or not self._thread.is_alive()
+
+    def run(self):
+        '''
+        Run the timelapse on this thread until all slots are done or stop() is called.
+        Output: see stats()
+        '''
+        if threading.current_thread() is not self._thread:
+            self._stop.clear()
+        self.start_time = time.perf_counter()
+        end_time = self.start_time + self.duration if self.duration is not None else None
+        slot = 0
+        try:
+            while not self._stop.is_set():
+                if self.count is not None and slot >= self.count:
+                    break
+                scheduled = self.start_time + slot * self.interval
+                if end_time is not None and scheduled > end_time:
+                    break
+                # sleep until shortly before the slot (waking up early if stopped), then wait for the exact moment
+                if self._stop.wait(max(scheduled - time.perf_counter() - 0.01, 0)):
+                    break
+                now = wait_until(scheduled)
+                if now - scheduled > self.max_late:
+                    # the scheduler itself fell behind, skip ahead to the next slot that can still be met
+                    next_slot = max(slot + 1, math.ceil((now - self.start_time) / self.interval))
+                    for i in range(len(self.cameras)):
+                        for missed_slot in range(slot, next_slot):
+                            self._missed(i, missed_slot, self.start_time + missed_slot * self.interval, 'scheduler woke up too late')
+                    slot = next_slot
+                    self.slots = slot
+                    continue
+                for i, worker in enumerate(self.workers):
+                    if self._busy[i] is not None and not self._busy[i].done():
+                        self._missed(i, slot, scheduled, 'camera still busy with the previous slot')
+                        continue
+                    self._busy[i] = worker.submit(self._shoot, i, slot, scheduled, scheduled + self.interval)
+                slot += 1
+                self.slots = slot
+        finally:
+            # let the running captures finish, then download everything that is still pending
+            finishing = [worker.submit(self._download_pending, i) if self.download else None for i, worker in enumerate(self.workers)]
+            for future in self._busy + finishing:
+                if future is not None:
+                    future.exception()
+            if self._own_workers:
+                for worker in self.workers:
+                    worker.shutdown(wait=True)
+        return self.stats()
+
+    def _record(self, i, shot):
+        with self._lock:
+            self.history.append(shot)
+            if shot.error is not None:
+                if shot.started is None:
+                    self.missed[i] += 1
+                else:
+                    self.errors[i] += 1
+            else:
+                self.shots[i] += 1
+                late = shot.started - shot.scheduled
+                self._late_sum[i] += late
+                self._late_max[i] = max(self._late_max[i], late)
+
+    def _missed(self, i, slot, scheduled, reason):
+        print(f"Timelapse slot {slot} missed by camera {i}: {reason}")
+        self._record(i, Shot(slot, i, scheduled, None, None, reason))
+
+    def _shoot(self, i, slot, scheduled, next_time):
+        # runs on the camera's worker thread
+        camera = self.cameras[i]
+        started = time.perf_counter()
+        camera_path = None
+        try:
+            success, file_path, msg = camera.capture_immediate(download=False)
+            error = None if success else msg
+            if success:
+                camera_path = camera.last_camera_path
+        except Exception as err:
+            error = str(err)
+        self._record(i, Shot(slot, i, scheduled, started, camera_path, error))
+        if self.download and camera_path is not None:
+            if len(self._pending[i]) >= self.max_pending:
+                self._pending[i].popleft() # the oldest image stays on the camera only
+                self.not_downloaded[i] += 1
+            self._pending[i].append(camera_path)
+            self._download_pending(i, next_time)
+
+    def _download_pending(self, i, deadline=None):
+        '''Download waiting images of camera i on its worker thread, as long as the previous transfer time still fits before the deadline.'''
+        camera = self.cameras[i]
+        pending = self._pending[i]
+        while pending:
+            if deadline is not None:
+                estimate = 1.2 * (camera.last_transfer_time or 0)
+                if time.perf_counter() + estimate > deadline - self.max_late:
+                    return
+            camera_path = pending.popleft()
+            target_file = os.path.join(self.target_paths[i], os.path.basename(camera_path))
+            if camera.download_file(camera_path, target_file) is None:
+                with self._lock:
+                    self.errors[i] += 1
+            else:
+                self.downloaded[i] += 1
+
+    def stats(self):
+        '''
+        Output: dict with the number of scheduled slots, and per camera (lists in camera order): successful shots, missed slots, errors,
+        downloaded images, images still waiting for download, images left on the camera, mean and maximum start delay in ms
+        '''
+        with self._lock:
+            return {
+                'slots': self.slots,
+                'shots': list(self.shots),
+                'missed': list(self.missed),
+                'errors': list(self.errors),
+                'downloaded': list(self.downloaded),
+                'pending': [len(pending) for pending in self._pending],
+                'not_downloaded': list(self.not_downloaded),
+                'mean_late_ms': [late_sum / shots * 1000 if shots else None for late_sum, shots in zip(self._late_sum, self.shots)],
+                'max_late_ms': [late * 1000 for late in self._late_max],
+            }
@@ -0,0 +1,15 @@
+import time
+
+def wait_until(deadline, spin=0.002):
+    '''
+    Wait until time.perf_counter() reaches the deadline, with about millisecond accuracy but near-zero CPU load:
+    the thread sleeps until shortly before the deadline and only spins for the last spin seconds (OS sleeps tend to overshoot by ~1 ms).
+    Output: the time.perf_counter() value at which the wait ended
+    '''
+    while True:
+        now = time.perf_counter()
+        remaining = deadline - now
+        if remaining <= 0:
+            return now
+        if remaining > spin:
+            time.sleep(remaining - spin)
@@ -29,9 +29,41 @@ msg = cam1.trigger_AF()
 # Capturing images and video
 success, msg = cam1.capture_preview(target_file='./preview.jpg') # capture a preview image, i.e. the viewfinder display
 cam1.show_live_preview() # start live preview, stop with q
+with cam1.preview_service() as preview: # capture preview frames on a background thread
+    frame = preview.wait_next(timeout=2) # or preview.latest(); frame.data holds the JPEG bytes
+    print(preview.stats()) # captured/dropped frames and effective fps
 out_file, msg = cam1.capture_image(download=True, target_file='./image.jpg') # capture a ful-res image
 success, out_file, msg = cam1.capture_video(t=1, download=True, target_path='.') # capture a video, t is duration in seconds
 success, files, msg = cam1.capture_burst(t=1) # capture a burst of images, t is duration in seconds
+success, manifest, msg = cam1.capture_sweep(aperture=[4, 8], iso=[100, 400], shutterspeed=['1/50', '1/200']) # one image per combination
+success, manifest, msg = cam1.capture_bracket(stops=[-2, 0, 2]) # exposure bracket around the current (manual) shutter speed
+success, manifest, msg = cam1.capture_focus_stack(slices=20, step=4) # focus stack from the current focus farther, lens switch set to MF
 
 # And finally, record full-res video in VIDEO mode
-success, file_path, msg = cam1.record_video(t=1, download=True, target_path='.')
\ No newline at end of file
+success, file_path, msg = cam1.record_video(t=1, download=True, target_path='.')
+
+# Multiple cameras: open all detected EOS cameras at once and send every command to all of them in parallel
+from rig import CameraRig
+rig = CameraRig() # optionally pass a list of ports, e.g. from gphoto_util.detect_EOS_cameras()
+msgs = rig.set_capture_parameters(aperture=8, iso=400, shutterspeed='1/100')
+results = rig.capture_image(download=True, target_path=[f'./cam{i}' for i in range(len(rig))]) # one directory and one (file_path, msg) tuple per camera
+results, skew = rig.capture_synchronized() # fire all cameras together, skew['file_added']['skew_ms'] is the measured inter-camera skew
+
+# Timelapse: one image every 10 s for an hour, on all cameras of the rig, downloads run in the gaps between shots
+from timelapse import Timelapse
+lapse = Timelapse(rig, interval=10, duration=3600, target_path='./timelapse')
+stats = lapse.run() # or lapse.start() ... lapse.stop(); stats['missed'] counts skipped slots per camera
+rig.close()
+
+# asyncio: one event loop drives all cameras, every camera runs its gphoto2 calls on its own executor thread
+import asyncio
+from async_eos import open_cameras
+
+async def shoot_all():
+    cams = await open_cameras()
+    await asyncio.gather(*[cam.set_capture_parameters(aperture=8) for cam in cams])
+    results = await asyncio.gather(*[cam.capture_image(download=True) for cam in cams])
+    await asyncio.gather(*[cam.close() for cam in cams])
+    return results
+
+results = asyncio.run(shoot_all())
@@ -0,0 +1,121 @@
+import queue, threading
+
+class FileWriter(object):
+    """
+    Write downloaded camera files to local storage on background threads.
+
+    The USB transfer itself (camera.file_get) must stay on the thread that owns the camera, but saving the received data
+    to disk can run in parallel with the next transfer. The queue is bounded, so a slow disk throttles the producer
+    instead of piling up whole image files in memory.
+    """
+
+    def __init__(self, max_queue=8, threads=1):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.written = []
+        self.errors = []
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(threads)]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, camera_file, target_file, callback=None):
+        '''
+        Queue a gphoto2 CameraFile (or any object with a save(path) method) to be written to target_file.
+        The optional callback(target_file) is run on the writer thread once the file is saved, e.g. to verify or rename it.
+        Blocks while the queue is full.
+        '''
+        self.queue.put((camera_file, target_file, callback))
+        return
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                camera_file, target_file, callback = item
+                try:
+                    camera_file.save(target_file)
+                    if callback is not None:
+                        callback(target_file)
+                    with self._lock:
+                        self.written.append(target_file)
+                except Exception as err:
+                    print(f"Could not write file {target_file}: {err}")
+                    with self._lock:
+                        self.errors.append((target_file, err))
+            finally:
+                self.queue.task_done()
+
+    def close(self):
+        '''
+        Wait until all queued files are written and stop the writer threads.
+        Output: list of written file paths (in order of completion), list of (file path, error) tuples
+        '''
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        return self.written, self.errors
+
+
+class PipeWriter(object):
+    """
+    Feed data (e.g. preview frames) into a stream, such as the stdin pipe of an ffmpeg process, on a background thread.
+
+    The producer only puts frames into a bounded queue, so back-pressure from the consumer never stalls the capture directly.
+    Frames are written as they are (bytes, memoryview, ...), without copying.
+    When the queue is full, the policy decides what happens: 'block' waits for the writer, 'drop' discards the new frame.
+    """
+
+    def __init__(self, stream, max_queue=16, policy='block'):
+        if policy not in ('block', 'drop'):
+            raise ValueError(f"Unknown back-pressure policy {policy}, use 'block' or 'drop'")
+        self.stream = stream
+        self.policy = policy
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.written = 0
+        self.error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, data):
+        '''
+        Queue data to be written to the stream.
+        Output: bool, False if the data was dropped because the writer fell behind
+        '''
+        if self.policy == 'drop':
+            try:
+                self.queue.put_nowait(data)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        else:
+            self.queue.put(data)
+        return True
+
+    def _run(self):
+        while True:
+            data = self.queue.get()
+            if data is None:
+                return
+            if self.error is not None:
+                continue # keep draining the queue, so that the producer never blocks on a dead stream
+            try:
+                self.stream.write(data)
+                self.written += 1
+            except Exception as err:
+                print(f"Writing to stream failed: {err}")
+                self.error = err
+
+    def close(self):
+        '''Wait until all queued data is written, then close the stream.'''
+        self.queue.put(None)
+        self._thread.join()
+        try:
+            self.stream.close()
+        except Exception as err:
+            if self.error is None:
+                self.error = err
+        return self.written, self.dropped